@@ -0,0 +1,140 @@
+"""Input parser benchmark
+
+Compares InputParser against the previous shlex based parser on generated configs of growing size.
+Run it from the repository root as `python -m benchmarks.input_parser`.
+
+Usage:
+  input_parser.py [options]
+
+Options:
+  -h --help                   Show this screen
+  --size=<size>               Size of the largest config in bytes [default: 1048576]
+  --repeat=<repeat>           Times to parse every config, keeping the fastest [default: 3]
+
+"""
+from io import StringIO
+import math
+import random
+import shlex
+import time
+import typing
+
+import docopt
+
+from models.input import ArrayToken, FunctionToken, InputParser, Token, ValueToken
+
+class ShlexInputParser():
+    """The shlex based parser InputParser replaced, kept to compare against"""
+    @classmethod
+    def parse(cls, stream:typing.TextIO) -> list[Token]:
+        reader = shlex.shlex(stream, posix=True)
+        tokens = []
+        while token := cls._parseToken(reader):
+            tokens.append(token)
+        return tokens
+
+    @classmethod
+    def _parseToken(cls, reader:shlex.shlex) -> Token:
+        value = reader.get_token()
+
+        if value == reader.eof:
+            return None
+
+        if value == '[':
+            reader.push_token(value)
+            return cls._parseArray(reader)
+
+        nextValue = reader.get_token()
+        reader.push_token(nextValue)
+
+        if nextValue == '(':
+            reader.push_token(value)
+            return cls._parseFunction(reader)
+
+        return ValueToken(value)
+
+    @classmethod
+    def _parseArray(cls, reader:shlex.shlex, start:str='[', end:str=']') -> ArrayToken:
+        arrayToken = ArrayToken()
+
+        startChar = reader.get_token()
+        if startChar != start:
+            raise ValueError(f"Unexpected array start token {startChar}, expected {start}")
+
+        while True:
+            token = cls._parseToken(reader)
+
+            if isinstance(token, ValueToken):
+                if token.value == end:
+                    return arrayToken
+
+                if token.value == ',':
+                    continue
+
+            arrayToken.items.append(token)
+
+    @classmethod
+    def _parseFunction(cls, reader:shlex.shlex) -> FunctionToken:
+        funcToken = FunctionToken(reader.get_token())
+        argsArray = cls._parseArray(reader, '(', ')')
+        funcToken.args = argsArray.items
+        return funcToken
+
+def getPolygon(segments:int) -> str:
+    """A polygon literal with quoted coordinates, like the ones generate.py prints"""
+    center = (random.random(), random.random())
+    radious = random.random() * 0.5
+    return str([
+        [
+            str(center[0] + math.cos(math.radians(360 * (float(x)/segments))) * radious),
+            str(center[1] + math.sin(math.radians(360 * (float(x)/segments))) * radious)
+        ]
+        for x in range(segments)
+    ])
+
+def getConfig(size:int) -> str:
+    parts = ["# Generated benchmark config\nSetColorMode(\n  PolygonColorMode([\n"]
+    length = len(parts[0])
+    while length < size:
+        part = f"""    [
+      NormalColorMode(
+        ArcColorMode(getSubcolors(["#ff0000","#ffa500","#ffff00","#008000"], 10, $true)),
+        mult(random(), "0.1"),
+        mult(random(), "0.1")
+      ),
+      {getPolygon(200)}
+    ],
+"""
+        parts.append(part)
+        length += len(part)
+    parts.append("  ])\n)\nSetDrawMode(SquaresDrawMode(100))\nDraw()\n")
+    return "".join(parts)
+
+def timeParse(parser, config:str, repeat:int) -> tuple[float, list[Token]]:
+    best = math.inf
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        tokens = parser.parse(StringIO(config))
+        best = min(best, time.perf_counter() - start_time)
+    return (best, tokens)
+
+def main():
+    arguments = docopt.docopt(__doc__)
+    size = int(arguments['--size'])
+    repeat = int(arguments['--repeat'])
+
+    random.seed(0)
+    print(f"{'bytes':>10} {'shlex (s)':>10} {'reader (s)':>10} {'speedup':>8} {'MB/s':>8}")
+    for divisor in (8, 4, 2, 1):
+        config = getConfig(size // divisor)
+
+        shlexTime, shlexTokens = timeParse(ShlexInputParser, config, repeat)
+        readerTime, readerTokens = timeParse(InputParser, config, repeat)
+
+        if repr(shlexTokens) != repr(readerTokens):
+            raise AssertionError("Parsers produced different token trees")
+
+        print(f"{len(config):>10} {shlexTime:>10.4f} {readerTime:>10.4f} {shlexTime / readerTime:>7.1f}x {len(config) / readerTime / 1e6:>8.2f}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""Model benchmark
+
+Compares the slotted FloatColor and Point against the dict backed versions they replaced, per
+operation and per instance. Run it from the repository root as
+`python -m benchmarks.model_objects`.
+
+Usage:
+  model_objects.py [options]
+
+Options:
+  -h --help                   Show this screen
+  --count=<count>             Operations to time, and instances to measure [default: 200000]
+
+"""
+from __future__ import annotations
+import math
+import timeit
+import tracemalloc
+
+import docopt
+
+from models import FloatColor, Point
+
+class DictFloatColor():
+    """FloatColor as it was before __slots__"""
+    def __init__(self, r:float, g:float, b:float, a:float=1):
+        self.r = r
+        self.g = g
+        self.b = b
+        self.a = a
+
+    def __add__(self, other:DictFloatColor):
+        return DictFloatColor(self.r + other.r, self.g + other.g, self.b + other.b, self.a + other.a)
+
+    def __mul__(self, y:float):
+        return DictFloatColor(self.r * y, self.g * y, self.b * y, self.a * y)
+
+class DictPoint(object):
+    """Point as it was before __slots__"""
+    def __init__(self, x:float, y:float):
+        self.x = x
+        self.y = y
+
+    def distance(self, other:DictPoint) -> float:
+        return math.dist((self.x, self.y), (other.x, other.y))
+
+    def __add__(self, other:DictPoint) -> DictPoint:
+        return DictPoint(self.x + other.x, self.y + other.y)
+
+    def rotateAround(self, other:DictPoint, angleRad:float) -> DictPoint:
+        return DictPoint(
+            math.cos(angleRad) * (self.x - other.x) - math.sin(angleRad) * (self.y - other.y) + other.x,
+            math.sin(angleRad) * (self.x - other.x) + math.cos(angleRad) * (self.y - other.y) + other.y
+        )
+
+def timeOperation(statement:str, setup:str, namespace:dict, count:int) -> float:
+    """Nanoseconds per run of the statement, best of 3"""
+    return min(timeit.repeat(statement, setup, globals=namespace, number=count, repeat=3)) / count * 1e9
+
+def measureInstances(build, count:int) -> float:
+    """Bytes per instance kept alive"""
+    tracemalloc.start()
+    instances = [build(i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+    return size / count
+
+def main():
+    arguments = docopt.docopt(__doc__)
+    count = int(arguments['--count'])
+
+    namespace = {
+        'FloatColor': FloatColor,
+        'Point': Point,
+        'DictFloatColor': DictFloatColor,
+        'DictPoint': DictPoint,
+    }
+
+    # Name, setup for both, then the statement for the dict and slotted versions
+    operations = [
+        ("FloatColor +", "a, b = {0}(0.1, 0.2, 0.3), {0}(0.4, 0.5, 0.6)", "a + b", "a + b"),
+        ("FloatColor *", "a = {0}(0.1, 0.2, 0.3)", "a * 0.5", "a * 0.5"),
+        ("FloatColor accumulate", "a, b = {0}(0, 0, 0), {0}(0.4, 0.5, 0.6)", "a = a + b", "a += b"),
+        ("Point +", "a, b = {1}(0.1, 0.2), {1}(0.5, 0.5)", "a + b", "a + b"),
+        ("Point accumulate", "a, b = {1}(0, 0), {1}(0.5, 0.5)", "a = a + b", "a += b"),
+        ("Point.distance", "a, b = {1}(0.1, 0.2), {1}(0.5, 0.5)", "a.distance(b)", "a.distance(b)"),
+        ("Point.rotateAround", "a, b = {1}(0.1, 0.2), {1}(0.5, 0.5)", "a.rotateAround(b, 0.3)", "a.rotateAround(b, 0.3)"),
+    ]
+
+    print(f"{'operation':<26} {'dict (ns)':>10} {'slots (ns)':>10} {'speedup':>8}")
+    for name, setup, dictStatement, statement in operations:
+        dictTime = timeOperation(dictStatement, setup.format('DictFloatColor', 'DictPoint'), namespace, count)
+        slotTime = timeOperation(statement, setup.format('FloatColor', 'Point'), namespace, count)
+        print(f"{name:<26} {dictTime:>10.1f} {slotTime:>10.1f} {dictTime / slotTime:>7.2f}x")
+
+    print()
+    print(f"{'instance':<26} {'dict (B)':>10} {'slots (B)':>10} {'saving':>8}")
+    for name, dictBuild, build in [
+        ("FloatColor", lambda i: DictFloatColor(i, i, i), lambda i: FloatColor(i, i, i)),
+        ("Point", lambda i: DictPoint(i, i), lambda i: Point(i, i)),
+    ]:
+        dictSize = measureInstances(dictBuild, count)
+        slotSize = measureInstances(build, count)
+        print(f"{name:<26} {dictSize:>10.1f} {slotSize:>10.1f} {1 - slotSize / dictSize:>7.0%}")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
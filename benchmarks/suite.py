@@ -0,0 +1,174 @@
+"""Render benchmark suite
+
+Renders every draw mode against representative color mode trees, including the configs in
+notes.md, at several canvas sizes and counts. Reports wall time, cost per cell drawn and peak
+traced memory, optionally writing them as JSON and comparing them against a stored baseline.
+Run it from the repository root as `python -m benchmarks.suite`, and it exits with status 1 when
+any case regressed.
+
+Usage:
+  suite.py [options]
+
+Options:
+  -h --help                   Show this screen
+  --sizes=<sizes>             Canvas sizes to render at, comma separated [default: 256,1024]
+  --repeat=<repeat>           Times to render every case, keeping the fastest [default: 3]
+  --filter=<filter>           Only run cases whose name contains this text
+  --output=<output>           Write the results to this JSON file
+  --baseline=<baseline>       Compare against results from an earlier --output
+  --threshold=<threshold>     Slowdown over the baseline flagged as a regression [default: 0.1]
+
+"""
+from __future__ import annotations
+from io import StringIO
+import json
+import os
+import platform
+import random
+import re
+import sys
+import textwrap
+import time
+import tracemalloc
+
+import docopt
+
+from draw_modes import DrawMode
+from models.cache import geometryCache
+from render import Renderer
+
+PALETTE = '["#37E2D5", "#590696", "#C70A80", "#FBCB0A"]'
+
+# Color mode trees, as statements setting the color mode
+COLOR_CASES = {
+    'gradient': f"SetColorMode(GradientColorMode({PALETTE}))",
+    'random': f'SetColorMode(RandomColorMode(getSubcolors({PALETTE}, 10, "$true")))',
+    'linear': "SetColorMode(LinearGradientColorMode())",
+    'voronoi': f"SetColorMode(VoronoiColorMode(GridColorMode(getSubcolors({PALETTE}, 3)), 200))",
+    'transform': f'SetColorMode(TransformColorMode(GlobeColorMode(ArcColorMode({PALETTE})), "0.1", 0, "0.8", "0.8", 30))',
+}
+
+def getNotesCases(path:str) -> dict[str, str]:
+    """The example configs in notes.md, keyed by their bullet's title"""
+    with open(path, mode='r') as stream:
+        notes = stream.read()
+
+    return {
+        re.sub(r'\W+', '-', title.strip()).strip('-').lower(): textwrap.dedent(block)
+        for (title, block) in re.findall(r'^- ([^\n]+)\n\n\s*```ini\n(.*?)\n\s*```', notes, re.MULTILINE | re.DOTALL)
+    }
+
+def getDrawCases(size:int) -> list[tuple[str, int]]:
+    """Every draw mode at representative counts, with how many cells each draws"""
+    cases:list[tuple[str, int]] = []
+    for count in (500, 5000):
+        cases.append((f"CirclesDrawMode({count})", count))
+    for count in (50, 200):
+        cases.append((f"SquaresDrawMode({count})", count ** 2))
+    for count in (50, 100):
+        cases.append((f"TrianglesDrawMode({count})", 2 * count ** 2))
+    for count in (25, 50):
+        cases.append((f"HexagonDrawMode({count})", (2 * count) ** 2))
+    cases.append(('PatternDrawMode([[0, 0], [1, 0], ["0.5", 1]], 50)', 50 ** 2))
+    for count in (300, 3000):
+        cases.append((f"VoronoiDrawMode({count})", count))
+    cases.append(("PixelDrawMode()", size ** 2))
+    return cases
+
+def run(renderer:Renderer, source:str) -> None:
+    renderer.clear()
+    geometryCache.clear()
+    random.seed(0)
+    renderer.render(StringIO(source))
+
+def measure(size:int, source:str, repeat:int) -> tuple[float, int]:
+    """The fastest of `repeat` renders in seconds, and the peak traced memory of one more in bytes"""
+    renderer = Renderer(size, size)
+
+    seconds = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        run(renderer, source)
+        seconds = min(seconds, time.perf_counter() - start_time)
+
+    # Traced separately, as tracing slows everything down
+    tracemalloc.start()
+    try:
+        run(renderer, source)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return (seconds, peak)
+
+def compare(results:dict[str, dict], baseline:dict[str, dict], threshold:float) -> list[str]:
+    """Names of the cases that got slower than the baseline by more than the threshold"""
+    regressions = []
+    for name, result in results.items():
+        if 'error' in result:
+            if name in baseline and 'error' not in baseline[name]:
+                print(f"Regression: {name} failed, but passed in the baseline")
+                regressions.append(name)
+            continue
+        if name not in baseline or 'error' in baseline[name]:
+            continue
+        ratio = result['seconds'] / baseline[name]['seconds']
+        if ratio > 1 + threshold:
+            print(f"Regression: {name} took {ratio:.2f}x the baseline ({baseline[name]['seconds']:.4f}s -> {result['seconds']:.4f}s)")
+            regressions.append(name)
+    return regressions
+
+def main():
+    arguments = docopt.docopt(__doc__)
+    sizes = [int(x) for x in arguments['--sizes'].split(',')]
+    repeat = int(arguments['--repeat'])
+
+    colorCases = dict(COLOR_CASES)
+    colorCases.update(getNotesCases(os.path.join(os.path.dirname(__file__), '..', 'notes.md')))
+
+    # Keep the suite covering every draw mode as new ones are added
+    covered = {expression.split('(')[0] for (expression, _) in getDrawCases(0)}
+    for drawMode in DrawMode.__subclasses__():
+        if drawMode.__name__ not in covered:
+            print(f"Warning: {drawMode.__name__} has no benchmark cases")
+
+    results:dict[str, dict] = {}
+    print(f"{'case':<80} {'seconds':>9} {'us/cell':>9} {'peak MB':>8}")
+    for size in sizes:
+        for (drawExpression, cells) in getDrawCases(size):
+            for (colorName, colorSource) in colorCases.items():
+                name = f"{size}/{drawExpression}/{colorName}"
+                if arguments['--filter'] and arguments['--filter'] not in name:
+                    continue
+
+                try:
+                    (seconds, peak) = measure(size, f"{colorSource}\nSetDrawMode({drawExpression})\nDraw()", repeat)
+                except Exception as ex:
+                    # Some combinations fail outright, which should not stop the rest
+                    print(f"{name:<80} failed: {ex!r}")
+                    results[name] = {'error': repr(ex)}
+                    continue
+
+                results[name] = {
+                    'seconds': seconds,
+                    'cells': cells,
+                    'secondsPerCell': seconds / cells,
+                    'peakBytes': peak,
+                }
+                print(f"{name:<80} {seconds:>9.4f} {seconds / cells * 1e6:>9.3f} {peak / 1e6:>8.2f}")
+
+    if arguments['--output']:
+        with open(arguments['--output'], mode='w') as stream:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            }, stream, indent=2)
+
+    if arguments['--baseline']:
+        with open(arguments['--baseline'], mode='r') as stream:
+            baseline = json.load(stream)['results']
+        if compare(results, baseline, float(arguments['--threshold'])):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,8 +1,28 @@
 from abc import abstractmethod
 
-from models import FloatColor
+import numpy as np
+
+from models import FloatColor, Palette
 
 class ColorMode(object):
     @abstractmethod
     def getColor(self, x:float, y:float) -> FloatColor:
-        pass
\ No newline at end of file
+        pass
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        """Get the colors for many points at once, as an (N, 4) RGBA float array.
+
+        Modes without a vectorized implementation fall back to calling getColor per point.
+        """
+        colors = np.empty((len(xs), 4), dtype=float)
+        for i, (x, y) in enumerate(zip(xs, ys)):
+            colors[i] = self.getColor(float(x), float(y)).toTuple()
+        return colors
+
+    def getPalette(self) -> Palette|None:
+        """The palette getIndices indexes into, or None when the colors do not come from a palette"""
+        return None
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        """Get the palette index for many points at once, or -1 where the point is clear"""
+        raise NotImplementedError(f"{type(self).__name__} has no palette")
\ No newline at end of file
@@ -1,13 +1,37 @@
 import math
 
+import numpy as np
+
 from color_modes import ColorMode
-from models import FloatColor, Point
+from models import FloatColor, Point, Palette
+from models.binary_search import Tree
 
 class ArcColorMode(ColorMode):
-    def __init__(self, colors:list[FloatColor]):
+    def __init__(self, colors:list[FloatColor]|Palette, stops:list[float]=None):
         self.center = Point(0.5, 0.5)
-        self.colors = list(colors)
+        self.colors = Palette.of(colors)
+
+        # Where around the circle each color starts, as fractions of a turn, or evenly spaced when unset
+        self.stops:Tree[float, int] = None
+        if stops is not None:
+            self.stops = Tree.fromStops(stops, len(self.colors))
 
     def getColor(self, x:float, y:float) -> FloatColor:
         angle = math.degrees(math.atan2(y - self.center.y, x - self.center.x))
-        return self.colors[math.floor(len(self.colors) * angle / 360)]
\ No newline at end of file
+        if self.stops:
+            return self.colors[self.stops.search((angle / 360) % 1)]
+        return self.colors[math.floor(len(self.colors) * angle / 360)]
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return self.colors.array[self.getIndices(xs, ys)]
+
+    def getPalette(self) -> Palette:
+        return self.colors
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        angles = np.degrees(np.arctan2(ys - self.center.y, xs - self.center.x))
+        if self.stops:
+            return self.stops.searchMany((angles / 360) % 1)
+
+        # Negative angles count back from the end, as in getColor
+        return np.floor(len(self.colors) * angles / 360).astype(int) % len(self.colors)
\ No newline at end of file
@@ -1,8 +1,11 @@
 import math
 import itertools
 
+import numpy as np
+
 from color_modes import ColorMode
-from models import FloatColor
+from models import FloatColor, Palette
+from models.binary_search import Tree
 
 class GradientColorMode(ColorMode):
     orientations = [
@@ -12,14 +15,38 @@ class GradientColorMode(ColorMode):
     ]
     scales = [2, 1, 1]
 
-    def __init__(self, colors:list[FloatColor], orientation:int=0):
-        self.colors = colors
+    def __init__(self, colors:list[FloatColor]|Palette, orientation:int=0, stops:list[float]=None):
+        self.colors = Palette.of(colors)
         self.weights = self.orientations[orientation]
         self.scale = self.scales[orientation]
 
+        # Where along the gradient each color starts, or evenly spaced when unset
+        self.stops:Tree[float, int] = None
+        if stops is not None:
+            self.stops = Tree.fromStops(stops, len(self.colors))
+
     def getColor(self, x:float, y:float) -> FloatColor:
+        if self.stops:
+            return self.colors[self.stops.search((x * self.weights[0] + y * self.weights[1]) / self.scale)]
+
         buckets = len(self.colors)
         index = math.floor((x * buckets * self.weights[0] + y * buckets * self.weights[1]) / self.scale)
         if (index == buckets):
             return self.colors[-1]
-        return self.colors[index]
\ No newline at end of file
+        return self.colors[index]
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return self.colors.array[self.getIndices(xs, ys)]
+
+    def getPalette(self) -> Palette:
+        return self.colors
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        if self.stops:
+            return self.stops.searchMany((xs * self.weights[0] + ys * self.weights[1]) / self.scale)
+
+        buckets = len(self.colors)
+        indices = np.floor((xs * buckets * self.weights[0] + ys * buckets * self.weights[1]) / self.scale).astype(int)
+        indices[indices == buckets] = buckets - 1
+        # Negative indices count back from the end, as in getColor
+        return indices % buckets
\ No newline at end of file
@@ -1,15 +1,29 @@
 import math
 
+import numpy as np
+
 from color_modes import ColorMode
-from models import FloatColor
+from models import FloatColor, Palette
 
 class GridColorMode(ColorMode):
-    def __init__(self, colors:list[FloatColor]):
-        self.colors = colors
+    def __init__(self, colors:list[FloatColor]|Palette):
+        self.colors = Palette.of(colors)
         self.side = int(math.sqrt(len(self.colors)))
 
     def getColor(self, x:float, y:float) -> FloatColor:
         index = math.floor(x * self.side) + math.floor(y * (self.side + 1)) * self.side
         if index >= len(self.colors):
             index = -1
-        return self.colors[index]
\ No newline at end of file
+        return self.colors[index]
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return self.colors.array[self.getIndices(xs, ys)]
+
+    def getPalette(self) -> Palette:
+        return self.colors
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        indices = (np.floor(xs * self.side) + np.floor(ys * (self.side + 1)) * self.side).astype(int)
+        indices[indices >= len(self.colors)] = len(self.colors) - 1
+        # Negative indices count back from the end, as in getColor
+        return indices % len(self.colors)
\ No newline at end of file
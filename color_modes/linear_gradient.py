@@ -1,8 +1,28 @@
 import colorsys
 
+import numpy as np
+
 from color_modes import ColorMode
 from models import FloatColor
 
+def hsvToRgb(h:np.ndarray, s:float, v:float) -> np.ndarray:
+    """Vectorized colorsys.hsv_to_rgb, returning an (N, 3) array"""
+    i = np.trunc(h * 6.0)
+    f = (h * 6.0) - i
+    p = np.full_like(h, v * (1.0 - s))
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    v = np.full_like(h, v)
+
+    # Every sector's (r, g, b), in the same order as colorsys
+    sectors = np.stack((v, t, p, q, v, p, p, v, t, p, q, v, t, p, v, v, p, q), axis=1).reshape(-1, 6, 3)
+    return sectors[np.arange(len(h)), i.astype(int) % 6]
+
 class LinearGradientColorMode(ColorMode):
     def getColor(self, x:float, y:float) -> FloatColor:
-        return FloatColor(*colorsys.hsv_to_rgb((x + y) * 0.5, 1, 1))
\ No newline at end of file
+        return FloatColor(*colorsys.hsv_to_rgb((x + y) * 0.5, 1, 1))
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        colors = np.ones((len(xs), 4), dtype=float)
+        colors[:, :3] = hsvToRgb((xs + ys) * 0.5, 1, 1)
+        return colors
\ No newline at end of file
@@ -1,3 +1,5 @@
+import numpy as np
+
 from color_modes import ColorMode
 from models import FloatColor
 
@@ -11,7 +13,14 @@ class AvgColorMode(ColorMode):
         self.colorModes = colorModes
 
     def getColor(self, x:float, y:float) -> FloatColor:
-        return sum([
-            colorMode.getColor(x, y)
+        total = FloatColor(0, 0, 0, 0)
+        for colorMode in self.colorModes:
+            total += colorMode.getColor(x, y)
+        total *= 1 / len(self.colorModes)
+        return total
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return np.mean([
+            colorMode.getColors(xs, ys)
             for colorMode in self.colorModes
-        ], FloatColor(0, 0, 0)) * (1 / len(self.colorModes))
\ No newline at end of file
+        ], axis=0)
\ No newline at end of file
@@ -1,5 +1,7 @@
+import numpy as np
+
 from color_modes import ColorMode
-from models import FloatColor
+from models import FloatColor, Palette
 
 class ClampColorMode(ColorMode):
     def __init__(self, child:ColorMode, threshold:float=0.5):
@@ -8,5 +10,25 @@ class ClampColorMode(ColorMode):
 
     def getColor(self, x:float, y:float) -> FloatColor:
         orig = self.child.getColor(x, y)
-        orig.a = 1 if orig.a >= self.theshold else 0
-        return orig
\ No newline at end of file
+        return FloatColor(orig.r, orig.g, orig.b, 1 if orig.a >= self.theshold else 0)
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        colors = self.child.getColors(xs, ys)
+        colors[:, 3] = colors[:, 3] >= self.theshold
+        return colors
+
+    def getPalette(self) -> Palette|None:
+        palette = self.child.getPalette()
+        if palette is None:
+            return None
+        colors = palette.array.copy()
+        colors[:, 3] = colors[:, 3] >= self.theshold
+        return Palette(colors)
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        indices = self.child.getIndices(xs, ys)
+
+        # Clamped away colors are clear rather than painting transparency over the raster
+        visible = self.child.getPalette().array[:, 3] >= self.theshold
+        indices[(indices >= 0) & ~visible[indices]] = -1
+        return indices
\ No newline at end of file
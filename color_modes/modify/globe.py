@@ -1,8 +1,10 @@
 from color_modes import ColorMode
-from models import FloatColor, Point
+from models import FloatColor, Palette, Point
 
 import math
 
+import numpy as np
+
 class GlobeColorMode(ColorMode):
     def __init__(self, child:ColorMode, x=0.5, y=0.5, radious=0.4):
         self.child = child
@@ -18,4 +20,24 @@ class GlobeColorMode(ColorMode):
             # looks like a grid in ortholinear space
             scaler = math.sin((dist_center/self.radious) * math.pi / 2)
             return self.child.getColor((x - self.center.x) * scaler + self.center.x, (y - self.center.y) * scaler + self.center.y)
-        return orig
\ No newline at end of file
+        return orig
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return self.child.getColors(*self._project(xs, ys))
+
+    def getPalette(self) -> Palette|None:
+        return self.child.getPalette()
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return self.child.getIndices(*self._project(xs, ys))
+
+    def _project(self, xs:np.ndarray, ys:np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        dist_center = np.hypot(xs - self.center.x, ys - self.center.y)
+
+        # Points outside the globe keep their position, so one batch covers both
+        scaler = np.where(
+            dist_center < self.radious,
+            np.sin((dist_center/self.radious) * math.pi / 2),
+            1
+        )
+        return ((xs - self.center.x) * scaler + self.center.x, (ys - self.center.y) * scaler + self.center.y)
\ No newline at end of file
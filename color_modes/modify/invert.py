@@ -1,5 +1,7 @@
+import numpy as np
+
 from color_modes import ColorMode
-from models import FloatColor
+from models import FloatColor, Palette
 
 class InvertColorMode(ColorMode):
     def __init__(self, child:ColorMode):
@@ -7,4 +9,35 @@ class InvertColorMode(ColorMode):
 
     def getColor(self, x:float, y:float) -> FloatColor:
         orig = self.child.getColor(x, y)
-        return FloatColor(1 - orig.r, 1 - orig.g, 1 - orig.b)
\ No newline at end of file
+        return FloatColor(1 - orig.r, 1 - orig.g, 1 - orig.b)
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        colors = self.child.getColors(xs, ys)
+        colors[:, :3] = 1 - colors[:, :3]
+        colors[:, 3] = 1
+        return colors
+
+    def getPalette(self) -> Palette|None:
+        palette = self.child.getPalette()
+        if palette is None:
+            return None
+        # Clear points invert to opaque white, so they get an entry of their own at the end
+        colors = np.concatenate((palette.array, [[0, 0, 0, 0]]))
+        colors[:, :3] = 1 - colors[:, :3]
+        colors[:, 3] = 1
+        return Palette(colors)
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        indices = self.child.getIndices(xs, ys)
+        clear = np.flatnonzero(indices < 0)
+        if len(clear) == 0:
+            return indices
+
+        # Clear points still invert to an opaque color, from whatever color they were cleared from,
+        # e.g. the palette color a clamp hid, or transparent black outside a transform or polygon
+        palette = self.child.getPalette().array
+        (colors, groups) = np.unique(self.child.getColors(xs[clear], ys[clear])[:, :3], axis=0, return_inverse=True)
+        matches = np.all(colors[:, None] == palette[None, :, :3], axis=2)
+        colorIndices = np.where(matches.any(axis=1), matches.argmax(axis=1), len(palette))
+        indices[clear] = colorIndices[groups.reshape(-1)]
+        return indices
\ No newline at end of file
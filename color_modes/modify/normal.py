@@ -1,8 +1,11 @@
 import math
 import random
 
+import numpy as np
+
 from color_modes import ColorMode
-from models import FloatColor
+from models import FloatColor, Palette
+from models.noise import hashNormal, hashNormalPoint
 
 class NormalColorMode(ColorMode):
     def __init__(self, child:ColorMode, xDivergance:float=0.1, yDivergance:float=0.1):
@@ -12,8 +15,26 @@ class NormalColorMode(ColorMode):
         self.xDivergance = xDivergance
         self.yDivergance = yDivergance
 
+        # The offsets are hashed from each point, so any split of the points gets the same offsets
+        self.seed = random.getrandbits(64)
+
     def getColor(self, x:float, y:float) -> FloatColor:
         return self.child.getColor(
-            x + random.normalvariate(0, self.xDivergance),
-            y + random.normalvariate(0, self.yDivergance)
+            x + hashNormalPoint(self.seed, x, y, self.xDivergance, 0),
+            y + hashNormalPoint(self.seed, x, y, self.yDivergance, 1)
+        )
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return self.child.getColors(*self._offset(xs, ys))
+
+    def getPalette(self) -> Palette|None:
+        return self.child.getPalette()
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return self.child.getIndices(*self._offset(xs, ys))
+
+    def _offset(self, xs:np.ndarray, ys:np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return (
+            xs + hashNormal(self.seed, xs, ys, self.xDivergance, 0),
+            ys + hashNormal(self.seed, xs, ys, self.yDivergance, 1)
         )
\ No newline at end of file
@@ -1,28 +1,51 @@
 from random import random
-from scipy.spatial import Voronoi, cKDTree
+
+import numpy as np
+from scipy.spatial import cKDTree
 
 from color_modes import ColorMode
-from models import FloatColor
+from models import FloatColor, Palette
+from models.cache import geometryCache
 
 class VoronoiColorMode(ColorMode):
     def __init__(self, child:ColorMode, count:int=10):
         self.child = child
+        self.tree:cKDTree = geometryCache.getRandom(('VoronoiColorMode', count), lambda: self._build(count))
+
+        # Every cell has its seed's color, so the child is only asked once per seed
+        self.seedColors:np.ndarray = None
+        self.seedIndices:np.ndarray = None
 
+    @staticmethod
+    def _build(count:int) -> cKDTree:
         points = [
             (random(), random())
             for _ in range(count)
         ]
 
-        # Add points so we don't have to figure out non-enclosed regions
-        points.append((-4, -4))
-        points.append((4, -4))
-        points.append((4, 4))
-        points.append((-4, 4))
+        return cKDTree(points)
+
+    def _getSeedColors(self) -> np.ndarray:
+        if self.seedColors is None:
+            self.seedColors = self.child.getColors(self.tree.data[:, 0], self.tree.data[:, 1])
+        return self.seedColors
 
-        self.voronoi = Voronoi(points)
-        self.tree = cKDTree(points)
+    def _getSeedIndices(self) -> np.ndarray:
+        if self.seedIndices is None:
+            self.seedIndices = self.child.getIndices(self.tree.data[:, 0], self.tree.data[:, 1])
+        return self.seedIndices
 
     def getColor(self, x:float, y:float) -> FloatColor:
-        test_point_dist, test_point_region = self.tree.query([[x, y]])
-        (p_x, p_y) = self.tree.data[test_point_region[0]]
-        return self.child.getColor(p_x, p_y)
\ No newline at end of file
+        test_point_dist, test_point_region = self.tree.query((x, y))
+        return FloatColor(*self._getSeedColors()[test_point_region])
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        test_point_dist, test_point_region = self.tree.query(np.column_stack((xs, ys)), workers=-1)
+        return self._getSeedColors()[test_point_region]
+
+    def getPalette(self) -> Palette|None:
+        return self.child.getPalette()
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        test_point_dist, test_point_region = self.tree.query(np.column_stack((xs, ys)), workers=-1)
+        return self._getSeedIndices()[test_point_region]
\ No newline at end of file
@@ -1,16 +1,43 @@
+import typing
+
+import numpy as np
 from scipy.spatial import Delaunay
 
 from color_modes import ColorMode
-from models import FloatColor, Point
+from models import FloatColor, Palette, Point
+from models.cache import geometryCache
+from models.spatial_index import GridIndex
 
 class PolygonColorMode(ColorMode):
     def __init__(self, polygons:list[tuple[ColorMode|FloatColor, list[tuple[float, float]]]]):
-        self.polygons:list[tuple[ColorMode|FloatColor, Delaunay]] = []
+        key = ('PolygonColorMode', tuple(
+            tuple(tuple(point) for point in points)
+            for (_, points) in polygons
+        ))
+        (hulls, self.index) = geometryCache.get(key, lambda: self._build([points for (_, points) in polygons]))
+
+        self.polygons:list[tuple[ColorMode|FloatColor, Delaunay]] = [
+            (color, hull)
+            for ((color, _), hull) in zip(polygons, hulls)
+        ]
 
-        for (color, points) in polygons:
+        # Built when first drawn indexed
+        self.paletteOffsets:tuple[Palette, list[int]] = None
+
+    @staticmethod
+    def _build(polygons:list[list[tuple[float, float]]]) -> tuple[list[Delaunay], GridIndex]:
+        hulls:list[Delaunay] = []
+        for points in polygons:
             hull = Delaunay(points)
             hull.close()
-            self.polygons.append((color, hull))
+            hulls.append(hull)
+
+        # Index the bounding boxes so lookups only test nearby polygons
+        index = GridIndex([
+            (*hull.min_bound, *hull.max_bound)
+            for hull in hulls
+        ])
+        return (hulls, index)
 
     def scaleToFit(self, hull:Delaunay, x:float, y:float) -> tuple[float, float]:
         newX = hull.min_bound[0] + x * (hull.max_bound[0] - hull.min_bound[0])
@@ -22,8 +49,15 @@ class PolygonColorMode(ColorMode):
         newY = (y - hull.min_bound[1]) / (hull.max_bound[1] - hull.min_bound[1])
         return (newX, newY)
 
+    @staticmethod
+    def inBounds(hull:Delaunay, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return (xs >= hull.min_bound[0]) & (xs <= hull.max_bound[0]) & (ys >= hull.min_bound[1]) & (ys <= hull.max_bound[1])
+
     def getColor(self, x:float, y:float) -> FloatColor:
-        for (child, hull) in self.polygons:
+        for index in self.index.candidates(x, y):
+            (child, hull) = self.polygons[index]
+            if not (hull.min_bound[0] <= x <= hull.max_bound[0] and hull.min_bound[1] <= y <= hull.max_bound[1]):
+                continue
             if hull.find_simplex((x, y)) >= 0:
                 if isinstance(child, ColorMode):
 
@@ -32,3 +66,69 @@ class PolygonColorMode(ColorMode):
                     return child.getColor(x, y)
                 return child
         return FloatColor(0, 0, 0, 0)
+
+    def _match(self, xs:np.ndarray, ys:np.ndarray) -> typing.Iterator[tuple[int, np.ndarray]]:
+        """Each polygon with the points it claims, in priority order"""
+        # Points a polygon has already claimed
+        claimed = np.zeros(len(xs), dtype=bool)
+
+        # Polygons come back in priority order, with only the points from the grid cells they overlap
+        for (index, candidates) in self.index.query(xs, ys):
+            (child, hull) = self.polygons[index]
+
+            # Only search the simplices for unclaimed points within the hull's bounds
+            candidates = candidates[~claimed[candidates]]
+            candidates = candidates[self.inBounds(hull, xs[candidates], ys[candidates])]
+            if len(candidates) == 0:
+                continue
+
+            matches = candidates[hull.find_simplex(np.column_stack((xs[candidates], ys[candidates]))) >= 0]
+            if len(matches) == 0:
+                continue
+
+            # First match wins
+            claimed[matches] = True
+            yield (index, matches)
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        colors = np.zeros((len(xs), 4), dtype=float)
+        for (index, matches) in self._match(xs, ys):
+            (child, hull) = self.polygons[index]
+            if isinstance(child, ColorMode):
+                colors[matches] = child.getColors(*self.invertFit(hull, xs[matches], ys[matches]))
+            else:
+                colors[matches] = child.toTuple()
+        return colors
+
+    def _getPaletteOffsets(self) -> tuple[Palette, list[int]]|None:
+        """Every polygon's palette joined together, and where each polygon's starts"""
+        if self.paletteOffsets is None:
+            palettes:list[Palette] = []
+            for (child, _) in self.polygons:
+                palette = child.getPalette() if isinstance(child, ColorMode) else Palette.of([child])
+                if palette is None:
+                    return None
+                palettes.append(palette)
+
+            offsets = [0]
+            for palette in palettes:
+                offsets.append(offsets[-1] + len(palette))
+            self.paletteOffsets = (Palette(np.concatenate([palette.array for palette in palettes] + [np.empty((0, 4))])), offsets)
+        return self.paletteOffsets
+
+    def getPalette(self) -> Palette|None:
+        paletteOffsets = self._getPaletteOffsets()
+        return paletteOffsets[0] if paletteOffsets else None
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        (_, offsets) = self._getPaletteOffsets()
+
+        indices = np.full(len(xs), -1, dtype=int)
+        for (index, matches) in self._match(xs, ys):
+            (child, hull) = self.polygons[index]
+            if isinstance(child, ColorMode):
+                childIndices = child.getIndices(*self.invertFit(hull, xs[matches], ys[matches]))
+                indices[matches] = np.where(childIndices >= 0, childIndices + offsets[index], -1)
+            else:
+                indices[matches] = offsets[index]
+        return indices
@@ -1,11 +1,27 @@
+import math
 import random
 
+import numpy as np
+
 from color_modes import ColorMode
-from models import FloatColor
+from models import FloatColor, Palette
+from models.noise import hashUniform, hashUniformPoint
 
 class RandomColorMode(ColorMode):
-    def __init__(self, colors:list[FloatColor]):
-        self.colors = colors
+    def __init__(self, colors:list[FloatColor]|Palette):
+        self.colors = Palette.of(colors)
+
+        # Colors are hashed from each point, so any split of the points gets the same colors
+        self.seed = random.getrandbits(64)
 
     def getColor(self, x:float, y:float) -> FloatColor:
-        return random.choice(self.colors)
\ No newline at end of file
+        return self.colors[math.floor(hashUniformPoint(self.seed, x, y) * len(self.colors))]
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return self.colors.array[self.getIndices(xs, ys)]
+
+    def getPalette(self) -> Palette:
+        return self.colors
+
+    def getIndices(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return np.floor(hashUniform(self.seed, xs, ys) * len(self.colors)).astype(int)
\ No newline at end of file
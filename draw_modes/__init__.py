@@ -1,10 +1,208 @@
+from __future__ import annotations
 from abc import abstractmethod
+import math
+import sys
 
 import cairo
+import numpy as np
 
 from color_modes import ColorMode
+from models import FloatColor, Palette
 
 class DrawMode(object):
     @abstractmethod
     def draw(self, context:cairo.Context, colorMode:ColorMode, width:int, height:int) -> None:
-        pass
\ No newline at end of file
+        pass
+
+    @staticmethod
+    def getDetail(context:cairo.Context) -> float:
+        """Device pixels per user space unit, up to 1, so modes can draw less detail into scaled down previews"""
+        x, y = context.user_to_device_distance(1, 1)
+        return min(1.0, abs(x), abs(y))
+
+    def drawIndices(self, raster:IndexRaster, context:cairo.Context, colorMode:ColorMode, width:int, height:int) -> None:
+        """Draw the color mode's palette indices into the raster, in place of drawing colors onto the context.
+
+        Modes without their own implementation draw as normal, through cairo, with every index encoded as a color.
+        """
+        raster.drawEncoded(self, context, colorMode, width, height)
+
+# Where each of R, G, B and A sit in a native-endian ARGB32 pixel
+CHANNEL_ORDER = [2, 1, 0, 3] if sys.byteorder == 'little' else [1, 2, 3, 0]
+ALPHA_BYTE = 3 if sys.byteorder == 'little' else 0
+
+def toPixels(colors:np.ndarray) -> np.ndarray:
+    """Convert straight RGBA float colors to pre-multiplied ARGB32 pixel bytes, rounding the way cairo does"""
+    colors = np.clip(colors, 0, 1)
+    premultiplied = np.empty(colors.shape, dtype=float)
+    premultiplied[..., :3] = colors[..., :3] * colors[..., 3:]
+    premultiplied[..., 3] = colors[..., 3]
+
+    pixels = np.empty(colors.shape, dtype=np.uint8)
+    pixels[..., CHANNEL_ORDER] = (np.floor(premultiplied * 65535 + 0.5).astype(np.uint32) >> 8).astype(np.uint8)
+    return pixels
+
+def fromPixels(pixels:np.ndarray) -> np.ndarray:
+    """Convert pre-multiplied ARGB32 pixel bytes to straight RGBA bytes, rounding the way cairo does when writing a PNG"""
+    alpha = pixels[..., ALPHA_BYTE].astype(np.uint32)
+    channels = pixels[..., CHANNEL_ORDER[:3]].astype(np.uint32)
+
+    straight = np.empty(pixels.shape, dtype=np.uint8)
+    straight[..., :3] = (channels * 255 + alpha[..., None] // 2) // np.maximum(alpha, 1)[..., None]
+    straight[..., 3] = alpha
+
+    # Fully transparent pixels come out all zero
+    straight[alpha == 0] = 0
+    return straight
+
+class PixelBuffer(object):
+    """A writable numpy view onto the pixels of the image surface behind a context.
+
+    Only available when user space maps 1:1 onto whole device pixels, i.e. the context is at most
+    translated by whole pixels. `bounds` is the user space window (x0, y0, x1, y1) that is on the
+    canvas, on the surface and inside the clip extents.
+    """
+    def __init__(self, surface:cairo.ImageSurface, offsetX:int, offsetY:int, bounds:tuple[int, int, int, int]):
+        self.surface = surface
+        self.offsetX = offsetX
+        self.offsetY = offsetY
+        self.bounds = bounds
+
+        # Make sure pending drawing has landed before touching the memory
+        surface.flush()
+        self.pixels = np.ndarray(
+            (surface.get_height(), surface.get_stride() // 4, 4),
+            dtype=np.uint8,
+            buffer=surface.get_data()
+        )[:, :surface.get_width()]
+
+    @classmethod
+    def fromContext(cls, context:cairo.Context, width:int, height:int) -> PixelBuffer|None:
+        surface = context.get_target()
+        if not isinstance(surface, cairo.ImageSurface) or surface.get_format() != cairo.FORMAT_ARGB32:
+            return None
+
+        if context.user_to_device_distance(1, 0) != (1, 0) or context.user_to_device_distance(0, 1) != (0, 1):
+            return None
+
+        offsetX, offsetY = context.user_to_device(0, 0)
+        if not (float(offsetX).is_integer() and float(offsetY).is_integer()):
+            return None
+        offsetX, offsetY = int(offsetX), int(offsetY)
+
+        clipX1, clipY1, clipX2, clipY2 = context.clip_extents()
+        bounds = (
+            max(0, math.floor(clipX1), -offsetX),
+            max(0, math.floor(clipY1), -offsetY),
+            min(width, math.ceil(clipX2), surface.get_width() - offsetX),
+            min(height, math.ceil(clipY2), surface.get_height() - offsetY),
+        )
+        return cls(surface, offsetX, offsetY, bounds)
+
+    @property
+    def empty(self) -> bool:
+        return self.bounds[0] >= self.bounds[2] or self.bounds[1] >= self.bounds[3]
+
+    def composite(self, x:int, y:int, pixels:np.ndarray) -> None:
+        """Paint a (height, width, 4) block of pixels from toPixels over the surface at user space x, y"""
+        height, width = pixels.shape[:2]
+        target = self.pixels[y + self.offsetY:y + self.offsetY + height, x + self.offsetX:x + self.offsetX + width]
+
+        alpha = pixels[..., ALPHA_BYTE]
+        if alpha.min() == 255:
+            target[...] = pixels
+            return
+
+        # OVER, with the same 8 bit arithmetic as pixman
+        scaled = target.astype(np.uint32) * (255 - alpha[..., None].astype(np.uint32)) + 0x80
+        scaled = ((scaled >> 8) + scaled) >> 8
+        target[...] = np.minimum(scaled + pixels, 255).astype(np.uint8)
+
+    def finish(self) -> None:
+        self.surface.mark_dirty()
+
+class IndexEncoder(object):
+    """Stands in for a color mode, painting index + 1 of each point's palette color as an opaque RGB color.
+
+    Clear points are painted fully transparent, so they leave whatever is below them.
+    """
+    def __init__(self, colorMode:ColorMode):
+        self.colorMode = colorMode
+
+    @staticmethod
+    def encode(indices:np.ndarray) -> np.ndarray:
+        codes = indices.astype(np.int64) + 1
+        colors = np.empty((len(codes), 4), dtype=float)
+        colors[:, 0] = (codes >> 16) & 255
+        colors[:, 1] = (codes >> 8) & 255
+        colors[:, 2] = codes & 255
+        colors[:, :3] /= 255
+        colors[:, 3] = codes > 0
+        return colors
+
+    def getColor(self, x:float, y:float) -> FloatColor:
+        return FloatColor(*self.getColors(np.array([x]), np.array([y]))[0].tolist())
+
+    def getColors(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        return self.encode(self.colorMode.getIndices(xs, ys))
+
+class IndexRaster(object):
+    """Palette index + 1 for every device pixel of a surface, or 0 where nothing was drawn"""
+    # Rows colorized at a time, which bounds the memory used
+    bandHeight = 256
+
+    def __init__(self, width:int, height:int, paletteSize:int):
+        if paletteSize < 255:
+            dtype = np.uint8
+        elif paletteSize < 65535:
+            dtype = np.uint16
+        else:
+            dtype = np.uint32
+        self.indices = np.zeros((height, width), dtype=dtype)
+
+    @classmethod
+    def forContext(cls, context:cairo.Context, paletteSize:int) -> IndexRaster:
+        surface = context.get_target()
+        return cls(surface.get_width(), surface.get_height(), paletteSize)
+
+    def write(self, x:int, y:int, indices:np.ndarray) -> None:
+        """Write a (height, width) block of palette indices at device pixel x, y, skipping -1s"""
+        height, width = indices.shape
+        target = self.indices[y:y + height, x:x + width]
+        drawn = indices >= 0
+        target[drawn] = indices[drawn] + 1
+
+    def drawEncoded(self, drawMode:DrawMode, context:cairo.Context, colorMode:ColorMode, width:int, height:int) -> None:
+        """Draw through cairo onto a scratch surface with the context's transform and clip, then decode the indices"""
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, self.indices.shape[1], self.indices.shape[0])
+        encodedContext = cairo.Context(surface)
+        encodedContext.set_matrix(context.get_matrix())
+        clipX1, clipY1, clipX2, clipY2 = context.clip_extents()
+        encodedContext.rectangle(clipX1, clipY1, clipX2 - clipX1, clipY2 - clipY1)
+        encodedContext.clip()
+
+        # Blended edges would mix neighbouring indices
+        encodedContext.set_antialias(cairo.ANTIALIAS_NONE)
+        drawMode.draw(encodedContext, IndexEncoder(colorMode), width, height)
+
+        surface.flush()
+        pixels = np.ndarray(
+            (surface.get_height(), surface.get_stride() // 4),
+            dtype=np.uint32,
+            buffer=surface.get_data()
+        )[:, :surface.get_width()]
+        drawn = (pixels >> 24) == 255
+        self.indices[drawn] = pixels[drawn] & 0xFFFFFF
+
+    def colorize(self, surface:cairo.ImageSurface, palette:Palette) -> None:
+        """Paint the palette's colors over the surface through a lookup table, wrapping indices past its end"""
+        lookup = toPixels(np.concatenate((np.zeros((1, 4)), palette.array)))
+        buffer = PixelBuffer(surface, 0, 0, (0, 0, surface.get_width(), surface.get_height()))
+
+        height = self.indices.shape[0]
+        for bandStart in range(0, height, self.bandHeight):
+            codes = self.indices[bandStart:bandStart + self.bandHeight]
+            if codes.max(initial=0) > len(palette):
+                codes = np.where(codes > 0, (codes.astype(np.int64) - 1) % len(palette) + 1, 0)
+            buffer.composite(0, bandStart, lookup[codes])
+        buffer.finish()
\ No newline at end of file
@@ -1,8 +1,11 @@
-import random
+import math
+
 import cairo
+import numpy as np
 
 from color_modes import ColorMode
 from draw_modes import DrawMode
+from models import getGenerator
 
 class CirclesDrawMode(DrawMode):
     def __init__(self, count:int=500, minSize:int=0, maxSize:int=50):
@@ -10,18 +13,40 @@ class CirclesDrawMode(DrawMode):
         self.minSize = minSize
         self.maxSize = maxSize
 
+    def _getCircles(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Centers as fractions of the canvas and radii in pixels, all drawn up front so culling does not change them"""
+        values = getGenerator().random((3, self.count))
+        return (values[0], values[1], values[2] * (self.maxSize - self.minSize) + self.minSize)
+
     def draw(self, context:cairo.Context, color_mode:ColorMode, width:int, height:int) -> None:
-        for _ in range(self.count):
-            x = random.random()
-            y = random.random()
+        (xs, ys, radii) = self._getCircles()
+        centerXs, centerYs = xs * width, ys * height
+
+        # Only circles reaching into the part of the canvas inside the clip
+        clipX1, clipY1, clipX2, clipY2 = context.clip_extents()
+        x0, y0, x1, y1 = max(0, clipX1), max(0, clipY1), min(width, clipX2), min(height, clipY2)
+        visible = (centerXs + radii > x0) & (centerXs - radii < x1) & (centerYs + radii > y0) & (centerYs - radii < y1)
 
-            color = color_mode.getColor(x, y)
+        # Previews skip circles under half a pixel across
+        detail = self.getDetail(context)
+        if detail < 1:
+            visible &= radii * detail >= 0.25
 
-            x = x * width
-            y = y * height
+        if not visible.any():
+            return
+        (xs, ys, radii) = (xs[visible], ys[visible], radii[visible])
+        (centerXs, centerYs) = (centerXs[visible], centerYs[visible])
 
-            radious = random.random() * (self.maxSize - self.minSize) + self.minSize
+        # One path and fill per distinct color, in sorted color order rather than the order the colors appear,
+        # which would change with the circles culled and stack a tile's circles differently to a whole draw's
+        (colors, groups) = np.unique(color_mode.getColors(xs, ys), axis=0, return_inverse=True)
+        groups = groups.reshape(-1)
+        order = np.argsort(groups, kind='stable')
+        groupStarts = np.flatnonzero(np.diff(groups[order])) + 1
 
-            context.set_source_rgba(*color.toTuple())
-            context.arc(x, y, radious, 0, 360)
+        for (color, group) in zip(colors.tolist(), np.split(order, groupStarts)):
+            context.set_source_rgba(*color)
+            for (x, y, radius) in zip(centerXs[group].tolist(), centerYs[group].tolist(), radii[group].tolist()):
+                context.new_sub_path()
+                context.arc(x, y, radius, 0, 2 * math.pi)
             context.fill()
\ No newline at end of file
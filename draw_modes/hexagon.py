@@ -27,9 +27,9 @@ class HexagonDrawMode(DrawMode):
                 -math.sin(math.radians(30)) * offset.x + offset.y,
             )
 
-    def _drawHexagon(self, context:cairo.Context, color_mode:ColorMode, width:int, height:int, offset:Point) -> None:
+    def _drawHexagon(self, context:cairo.Context, color_mode:ColorMode, width:int, height:int, offset:Point, count:int) -> None:
         origin = self.origin * Point(width, height)
-        scale = Point(width/self.count, height/self.count)
+        scale = Point(width/count, height/count)
 
         hexCenter = origin + self._translate(offset) * scale
         if hexCenter.x < -scale.x or hexCenter.x > width + scale.x:
@@ -58,7 +58,13 @@ class HexagonDrawMode(DrawMode):
         context.fill()
 
     def draw(self, context:cairo.Context, color_mode:ColorMode, width:int, height:int) -> None:
+        # Previews use fewer hexagons, so none is less than a few pixels across
+        count = self.count
+        detail = self.getDetail(context)
+        if detail < 1:
+            count = min(self.count, max(1, floor(width * detail / 4)))
+
         # Draw the center hexagon
-        for xOffset in range(-self.count, self.count):
-            for yOffset in range(-self.count, self.count):
-                self._drawHexagon(context, color_mode, width, height, Point(xOffset, yOffset))
\ No newline at end of file
+        for xOffset in range(-count, count):
+            for yOffset in range(-count, count):
+                self._drawHexagon(context, color_mode, width, height, Point(xOffset, yOffset), count)
\ No newline at end of file
@@ -0,0 +1,73 @@
+from math import ceil
+
+import cairo
+import numpy as np
+
+from color_modes import ColorMode
+from draw_modes import DrawMode, IndexRaster, PixelBuffer, toPixels
+
+class PixelDrawMode(DrawMode):
+    def __init__(self, chunkSize:int=65536):
+        # The most pixels evaluated at once, which bounds the memory used
+        self.chunkSize = chunkSize
+
+    @staticmethod
+    def _getPoints(x0:int, x1:int, y0:int, y1:int, width:int, height:int) -> tuple[np.ndarray, np.ndarray]:
+        # Sample at the pixel centers
+        xs = (np.arange(x0, x1) + 0.5) / width
+        ys = (np.arange(y0, y1) + 0.5) / height
+        return (np.tile(xs, y1 - y0), np.repeat(ys, x1 - x0))
+
+    def _getChunk(self, color_mode:ColorMode, x0:int, x1:int, y0:int, y1:int, width:int, height:int) -> np.ndarray:
+        colors = color_mode.getColors(*self._getPoints(x0, x1, y0, y1, width, height))
+        return toPixels(colors).reshape(y1 - y0, x1 - x0, 4)
+
+    def drawIndices(self, raster:IndexRaster, context:cairo.Context, color_mode:ColorMode, width:int, height:int) -> None:
+        buffer = PixelBuffer.fromContext(context, width, height)
+        if not buffer:
+            super().drawIndices(raster, context, color_mode, width, height)
+            return
+
+        x0, y0, x1, y1 = buffer.bounds
+        if buffer.empty:
+            return
+
+        rows = max(1, self.chunkSize // (x1 - x0))
+        for chunkStart in range(y0, y1, rows):
+            chunkEnd = min(chunkStart + rows, y1)
+            indices = color_mode.getIndices(*self._getPoints(x0, x1, chunkStart, chunkEnd, width, height))
+            raster.write(x0 + buffer.offsetX, chunkStart + buffer.offsetY, indices.reshape(chunkEnd - chunkStart, x1 - x0))
+
+    def draw(self, context:cairo.Context, color_mode:ColorMode, width:int, height:int) -> None:
+        buffer = PixelBuffer.fromContext(context, width, height)
+        if buffer:
+            x0, y0, x1, y1 = buffer.bounds
+            if buffer.empty:
+                return
+
+            rows = max(1, self.chunkSize // (x1 - x0))
+            for chunkStart in range(y0, y1, rows):
+                chunkEnd = min(chunkStart + rows, y1)
+                buffer.composite(x0, chunkStart, self._getChunk(color_mode, x0, x1, chunkStart, chunkEnd, width, height))
+            buffer.finish()
+            return
+
+        # Not drawing 1:1 onto an image surface, so paint every chunk through cairo instead, sampling
+        # no more points than there are device pixels when scaled down
+        detail = self.getDetail(context)
+        columns, lines = max(1, ceil(width * detail)), max(1, ceil(height * detail))
+
+        context.save()
+        context.scale(width / columns, height / lines)
+        rows = max(1, self.chunkSize // columns)
+        for chunkStart in range(0, lines, rows):
+            chunkEnd = min(chunkStart + rows, lines)
+            chunk = cairo.ImageSurface(cairo.FORMAT_ARGB32, columns, chunkEnd - chunkStart)
+            PixelBuffer(chunk, 0, 0, (0, 0, columns, chunkEnd - chunkStart)).composite(
+                0, 0, self._getChunk(color_mode, 0, columns, chunkStart, chunkEnd, columns, lines)
+            )
+            chunk.mark_dirty()
+
+            context.set_source_surface(chunk, 0, chunkStart)
+            context.paint()
+        context.restore()
\ No newline at end of file
@@ -1,14 +1,25 @@
 from math import ceil, floor
+import typing
+
 import cairo
+import numpy as np
 
 from color_modes import ColorMode
-from draw_modes import DrawMode
+from draw_modes import DrawMode, IndexRaster, PixelBuffer, toPixels
 
 class SquaresDrawMode(DrawMode):
+    # Rows written to the surface at a time by the pixel buffer path
+    bandHeight = 256
+
     def __init__(self, count:int=50):
         self.count = count
 
     def draw(self, context:cairo.Context, color_mode:ColorMode, width:int, height:int) -> None:
+        buffer = PixelBuffer.fromContext(context, width, height)
+        if buffer:
+            self._drawPixels(buffer, color_mode, width, height)
+            return
+
         x_step = width/self.count
         y_step = height/self.count
 
@@ -18,4 +29,51 @@ class SquaresDrawMode(DrawMode):
 
                 context.set_source_rgba(*color.toTuple())
                 context.rectangle(floor(count_x * x_step), floor(count_y * y_step), ceil(x_step), ceil(y_step))
-                context.fill()
\ No newline at end of file
+                context.fill()
+
+    def _cellMap(self, size:int) -> np.ndarray:
+        """The cell painted last over every pixel along one axis, or -1 where no cell reaches"""
+        step = size/self.count
+        starts = np.floor(np.arange(self.count) * step).astype(int)
+        pixels = np.arange(size)
+        cells = np.searchsorted(starts, pixels, side='right') - 1
+        return np.where(pixels < starts[cells] + ceil(step), cells, -1)
+
+    def _cellPoints(self) -> tuple[np.ndarray, np.ndarray]:
+        # Same cell order as the cairo path, so later cells still win where they overlap
+        steps = np.arange(self.count) / self.count
+        return (np.repeat(steps, self.count), np.tile(steps, self.count))
+
+    def _drawPixels(self, buffer:PixelBuffer, color_mode:ColorMode, width:int, height:int) -> None:
+        cellPixels = toPixels(color_mode.getColors(*self._cellPoints())).reshape(self.count, self.count, 4)
+        self._drawCells(buffer, cellPixels, width, height, buffer.composite)
+        buffer.finish()
+
+    def drawIndices(self, raster:IndexRaster, context:cairo.Context, color_mode:ColorMode, width:int, height:int) -> None:
+        buffer = PixelBuffer.fromContext(context, width, height)
+        if not buffer:
+            super().drawIndices(raster, context, color_mode, width, height)
+            return
+
+        cellIndices = color_mode.getIndices(*self._cellPoints()).reshape(self.count, self.count)
+        self._drawCells(buffer, cellIndices, width, height, lambda x, y, indices: raster.write(x + buffer.offsetX, y + buffer.offsetY, indices))
+
+    def _drawCells(self, buffer:PixelBuffer, cells:np.ndarray, width:int, height:int, write:typing.Callable[[int, int, np.ndarray], None]) -> None:
+        """Write each band of pixels, looked up from the (count, count) cells covering them"""
+        x0, y0, x1, y1 = buffer.bounds
+        if buffer.empty:
+            return
+
+        columns = self._cellMap(width)[x0:x1]
+        rows = self._cellMap(height)[y0:y1]
+
+        # Pixels past the last cell are left alone, as cairo would
+        x1 = x0 + int(np.count_nonzero(columns >= 0))
+        columns = columns[:x1 - x0]
+
+        for bandStart in range(y0, y1, self.bandHeight):
+            bandRows = rows[bandStart - y0:bandStart - y0 + self.bandHeight]
+            bandRows = bandRows[bandRows >= 0]
+            if len(bandRows) == 0 or len(columns) == 0:
+                continue
+            write(x0, bandStart, cells[columns[None, :], bandRows[:, None]])
\ No newline at end of file
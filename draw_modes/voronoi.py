@@ -5,9 +5,14 @@ from scipy.spatial import Voronoi
 
 from color_modes import ColorMode
 from draw_modes import DrawMode
+from models.cache import geometryCache
 
 class VoronoiDrawMode(DrawMode):
     def __init__(self, count:int=3000):
+        self.voronoi:Voronoi = geometryCache.getRandom(('VoronoiDrawMode', count), lambda: self._build(count))
+
+    @staticmethod
+    def _build(count:int) -> Voronoi:
         points = [
             (random(), random())
             for _ in range(count)
@@ -19,7 +24,7 @@ class VoronoiDrawMode(DrawMode):
         points.append((4, 4))
         points.append((-4, 4))
 
-        self.voronoi = Voronoi(points)
+        return Voronoi(points)
 
     def draw(self, context:cairo.Context, color_mode:ColorMode, width:int, height:int) -> None:
         region_points = {
@@ -6,13 +6,18 @@ Usage:
 Options:
   -h --help                   Show this screen
   -v --verbose                Print additional information
+  --profile                   Log the time spent in every part of the input after each render
+  --telemetry                 Log the peak memory, model object counts and surface size of each render as JSON
 
 """
 from __future__ import annotations
+from io import StringIO
+import contextlib
 import datetime
-import itertools
 import logging
-import os
+import queue
+import threading
+import time
 
 import cairo
 import docopt
@@ -20,145 +25,177 @@ import random
 import string
 import tkinter
 
-from color_modes import ColorMode
-from color_modes.gradient import GradientColorMode
-from color_modes.grid import GridColorMode
-from color_modes.linear_gradient import LinearGradientColorMode
-from color_modes.polygon import PolygonColorMode
-from color_modes.random import RandomColorMode
-from color_modes.modify.clamp import ClampColorMode
-from color_modes.modify.normal import NormalColorMode
-from color_modes.modify.transform import TransformColorMode
-from color_modes.modify.avg import AvgColorMode
-from color_modes.arc import ArcColorMode
-from color_modes.modify.globe import GlobeColorMode
-from color_modes.modify.voronoi import VoronoiColorMode
-
-from draw_modes import DrawMode
-from draw_modes.circles import CirclesDrawMode
-from draw_modes.squares import SquaresDrawMode
-from draw_modes.triangles import TrianglesDrawMode
-from draw_modes.voronoi import VoronoiDrawMode
-from draw_modes.pattern import PatternDrawMode
-from draw_modes.hexagon import HexagonDrawMode
-
 from PIL import Image, ImageTk
-from models import FloatColor
 
-from models.input import InputParser, InputEvaluator
+from models.cache import geometryCache
+from models.telemetry import Telemetry
+from render import RenderCancelled, Renderer
+from watcher import FileWatcher
 
 class DrawUI(tkinter.Tk):
-    def __init__(self, *args, **kwargs):
+    # Longest sides of the quick passes shown, scaled up, before each full size render
+    previewSizes = [128, 256]
+
+    def __init__(self, *args, profile:bool=False, telemetry:bool=False, **kwargs):
         super().__init__(*args, **kwargs)
         self.width, self.height = 1024, 1024
+        self.profile = profile
+        self.telemetry = telemetry
 
         self.inputFile = "input.conf"
         self.geometry("{}x{}".format(self.width + 50, self.height + 50))
 
-        self.surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, self.width, self.height)
-        self.context = cairo.Context(self.surface)
-        self.image: tkinter.Label = None
+        self.renderer = Renderer(self.width, self.height, [self._saveImage])
+        # One photo and label, updated in place on every refresh
+        self.photo = ImageTk.PhotoImage("RGBA", (self.width, self.height))
+        self.image = tkinter.Label(self, image=self.photo)
+        self.image.grid(column=0, row=2, columnspan=10, rowspan=9)
         self.imagePrefix = ''.join(random.choice(string.ascii_lowercase+string.digits) for _ in range(8))
         self.imageCount = 0
 
-        self._clearImage()
-
         tkinter.Button(self, text="Generate", command=self.draw).grid(column=0, row=0)
         tkinter.Button(self, text="Clear", command=self._clearImage).grid(column=1, row=0)
-        tkinter.Button(self, text="Save", command=self._saveImage).grid(column=2, row=0)
+        tkinter.Button(self, text="Save", command=lambda: self._request('save')).grid(column=2, row=0)
 
         self.redraw = tkinter.BooleanVar(self, False)
         tkinter.Checkbutton(self, text="Redraw", variable=self.redraw).grid(column=3, row=0)
 
-        self.drawMode:DrawMode = None
-        def SetDrawMode(drawMode:DrawMode):
-            self.drawMode = drawMode
-
-        self.colorMode:ColorMode = None
-        def SetColorMode(colorMode:ColorMode):
-            self.colorMode = colorMode
-
-        def Draw():
-            if not self.colorMode:
-                logging.error("Color mode unset, unable to draw")
-                return
-
-            if not self.drawMode:
-                logging.error("Draw mode unset, unable to draw")
-                return
-
-            self.drawMode.draw(self.context, self.colorMode, self.width, self.height)
-
-        def parseTypes(input:str):
-            if input.startswith("#") and (len(input) == 7 or len(input) == 9):
-                return FloatColor.fromHex(input)
-
-        self.parser = InputEvaluator(
-            itertools.chain(
-                DrawMode.__subclasses__(),
-                ColorMode.__subclasses__(),
-                [
-                    SetDrawMode,
-                    SetColorMode,
-                    Draw,
-                    FloatColor.getSubcolors,
-                    self._saveImage,
-                ]
-            ),
-            parseTypes
-        )
-
-        self.inputModifiedTime:float = None
-        self.after(700, self._checkInput)
-
-    def _checkInput(self) -> None:
-        newModifiedTime = os.path.getmtime(self.inputFile)
-        fileChanged = self.inputModifiedTime == None or newModifiedTime > self.inputModifiedTime
-        self.inputModifiedTime = newModifiedTime
-
-        existingDelay = 700
-        startTime = datetime.datetime.now()
-        if fileChanged or self.redraw.get():
+        # Only the render thread touches the renderer. It takes (generation, kind, incremental) requests
+        # and hands back (generation, image, final) for the Tk thread to show
+        self.requests:queue.Queue[tuple[int, str, bool]] = queue.Queue()
+        self.results:queue.Queue[tuple[int, Image.Image|None, bool]] = queue.Queue()
+
+        # Every request gets a newer generation, and a render gives up as soon as a newer render or clear is requested
+        self.generationLock = threading.Lock()
+        self.generation = 0
+        self.latestGeneration = 0
+        self.currentGeneration = 0
+        self.renderer.cancelled = lambda: self.currentGeneration != self.latestGeneration
+
+        # Whether the latest render or clear has yet to come back, and when it was asked for
+        self.busy = False
+        self.requestTime = 0.0
+
+        threading.Thread(target=self._renderLoop, daemon=True).start()
+        self._clearImage()
+
+        # Only rebuild what an edit changed
+        self.watcher = FileWatcher(self.inputFile, lambda: self.draw(incremental=True))
+        self.watcher.start()
+        self.draw(incremental=True)
+
+        self.after(50, self._checkResults)
+
+    def _request(self, kind:str, incremental:bool=False) -> None:
+        """Queue work for the render thread, from any thread"""
+        with self.generationLock:
+            self.generation += 1
+            if kind != 'save':
+                self.latestGeneration = self.generation
+                self.busy = True
+                self.requestTime = time.monotonic()
+            self.requests.put((self.generation, kind, incremental))
+
+    def _renderLoop(self) -> None:
+        while True:
+            (generation, kind, incremental) = self.requests.get()
+            if kind == 'save':
+                self._saveImage()
+                continue
+
+            # Skip renders superseded while they waited
+            if kind == 'render' and generation != self.latestGeneration:
+                continue
+
+            self.currentGeneration = generation
+            image = None
+            try:
+                if kind == 'clear':
+                    self.renderer.clear()
+                else:
+                    start_time = datetime.datetime.now()
+                    with open(self.inputFile, mode='r') as stream:
+                        source = stream.read()
+
+                    # Measures the previews along with the full size render
+                    with (Telemetry() if self.telemetry else contextlib.nullcontext()) as measure:
+                        # Every pass starts from the same random state, so the previews match the final image
+                        state = random.getstate()
+                        for size in self.previewSizes:
+                            if size >= max(self.width, self.height):
+                                continue
+                            random.setstate(state)
+                            preview = self.renderer.renderPreview(StringIO(source), size, incremental)
+                            self.results.put((generation, self._getImage(preview).resize((self.width, self.height), Image.BILINEAR), False))
+
+                            # Later passes reuse the objects the first one built
+                            incremental = True
+
+                        random.setstate(state)
+                        profiler = self.renderer.createProfiler() if self.profile else None
+                        self.renderer.render(StringIO(source), incremental, profiler)
+                    time_elapsed = datetime.datetime.now() - start_time
+                    if profiler:
+                        logging.info("Draw took %f seconds, of which the full size render:\n%s", time_elapsed.total_seconds(), profiler.format())
+                    else:
+                        logging.info("Draw took %f seconds", time_elapsed.total_seconds())
+                    if measure:
+                        measure.recordSurface(self.renderer.surface)
+                        logging.info("Telemetry: %s", measure.toJson())
+                    logging.debug("Geometry cache has %d entries, %d hits, %d misses", len(geometryCache), geometryCache.hits, geometryCache.misses)
+
+                image = self._getImage(self.renderer.surface)
+            except RenderCancelled:
+                logging.debug("Render superseded by a newer request")
+                continue
+            except Exception as ex:
+                logging.exception(ex)
+            self.results.put((generation, image, True))
+
+    def _checkResults(self) -> None:
+        image = None
+        while not self.results.empty():
+            (generation, newImage, final) = self.results.get()
+            if final and generation == self.latestGeneration:
+                self.busy = False
+            if newImage is not None:
+                image = newImage
+
+        if image:
+            self.photo.paste(image)
+
+        if self.redraw.get() and not self.busy and time.monotonic() - self.requestTime >= 0.7:
             self.draw()
-        existingDelay = existingDelay - int((datetime.datetime.now() - startTime).total_seconds() * 1000)
-        self.after(existingDelay, self._checkInput)
+        self.after(50, self._checkResults)
 
     def _clearImage(self):
-        self.surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, self.width, self.height)
-        self.context = cairo.Context(self.surface)
-        self._setImage()
+        self._request('clear')
 
-    def _setImage(self):
-        self._image_ref = ImageTk.PhotoImage(Image.frombuffer("RGBA", (self.width, self.height), self.surface.get_data().tobytes(), "raw", "BGRA", 0, 1))
-        self.image = tkinter.Label(self, image=self._image_ref)
-        self.image.grid(column=0, row=2, columnspan=10, rowspan=9)
+    @staticmethod
+    def _getImage(surface:cairo.ImageSurface) -> Image.Image:
+        """Copy a surface into a new image, decoding straight from the surface's memory.
+
+        The image never shares the surface's memory, so the Tk thread can show it while the next
+        render draws into the surface.
+        """
+        surface.flush()
+        return Image.frombytes("RGBA", (surface.get_width(), surface.get_height()), surface.get_data(), "raw", "BGRA", surface.get_stride(), 1)
 
     def _saveImage(self):
-        self.surface.write_to_png(f"generated/{self.imagePrefix}_{self.imageCount}.png")
+        if self.renderer.previewing:
+            return
+        self.renderer.surface.write_to_png(f"generated/{self.imagePrefix}_{self.imageCount}.png")
         self.imageCount += 1
 
-    def draw(self):
-        try:
-            if self.image:
-                self.image.destroy()
-
-            with open(self.inputFile, mode='r') as stream:
-                tokens = InputParser.parse(stream)
-
-            start_time = datetime.datetime.now()
-            self.parser.parse(tokens)
-            time_elapsed = datetime.datetime.now() - start_time
-            logging.info("Draw took %f seconds", time_elapsed.total_seconds())
-
-            self._setImage()
-        except Exception as ex:
-            logging.exception(ex)
+    def draw(self, incremental:bool=False):
+        self._request('render', incremental)
 
 def main():
     arguments = docopt.docopt(__doc__, version='v0.0.0')
     logging.basicConfig(level=(logging.DEBUG if arguments['--verbose'] else logging.INFO))
-    window = DrawUI()
+    window = DrawUI(profile=arguments['--profile'], telemetry=arguments['--telemetry'])
     window.mainloop()
+    window.watcher.stop()
 
 if __name__ == '__main__':
     main()
@@ -1,9 +1,19 @@
 from __future__ import annotations
 
-from math import atan2, dist
+from math import atan2
 import math
+import random
+import typing
+
+import numpy as np
+
+def getGenerator() -> np.random.Generator:
+    """Get a numpy generator seeded from the `random` module, so `random.seed` also governs vectorized draws"""
+    return np.random.default_rng(random.getrandbits(64))
 
 class FloatColor():
+    __slots__ = ('r', 'g', 'b', 'a')
+
     def __init__(self, r:float, g:float, b:float, a:float=1):
         self.r = r
         self.g = g
@@ -11,7 +21,6 @@ class FloatColor():
         self.a = a
 
     def toHex(self):
-        hex(int(self.g * 255))
         return "#{:02x}{:02x}{:02x}{:02x}".format(int(self.r * 255), int(self.g * 255), int(self.b * 255), int(self.a * 255)).upper()
 
     def toTuple(self) -> tuple[float, float, float, float]:
@@ -47,7 +56,7 @@ class FloatColor():
             self.a * y,
         )
 
-    def __div__(self, y:float):
+    def __truediv__(self, y:float):
         return FloatColor(
             self.r / y,
             self.g / y,
@@ -55,6 +64,36 @@ class FloatColor():
             self.a / y,
         )
 
+    # In-place variants, for accumulating without a new color per step. Only use these on colors
+    # you own, never on ones shared with a palette.
+    def __iadd__(self, other:FloatColor):
+        self.r += other.r
+        self.g += other.g
+        self.b += other.b
+        self.a += other.a
+        return self
+
+    def __isub__(self, other:FloatColor):
+        self.r -= other.r
+        self.g -= other.g
+        self.b -= other.b
+        self.a -= other.a
+        return self
+
+    def __imul__(self, y:float):
+        self.r *= y
+        self.g *= y
+        self.b *= y
+        self.a *= y
+        return self
+
+    def __itruediv__(self, y:float):
+        self.r /= y
+        self.g /= y
+        self.b /= y
+        self.a /= y
+        return self
+
     @classmethod
     def fromHex(cls, input:str) -> FloatColor:
         input = input.strip().strip('#')
@@ -69,61 +108,127 @@ class FloatColor():
 
     @classmethod
     def fromHexList(cls, input:str) -> list[FloatColor]:
-        return [
-            cls.fromHex(x)
-            for x in input.split(',')
-        ]
+        return list(Palette.fromHexList(input))
 
     @classmethod
-    def getSubcolors(cls, colors:list[FloatColor], subcount:int, wrap=False) -> list[FloatColor]:
-        full_colors = list()
+    def getSubcolors(cls, colors:list[FloatColor]|Palette, subcount:int, wrap=False) -> Palette:
+        return Palette.of(colors).getSubcolors(subcount, wrap)
+
+class Palette():
+    """An ordered set of colors, stored as an (N, 4) RGBA float array"""
+    __slots__ = ('array',)
+
+    def __init__(self, array:np.ndarray):
+        self.array = np.asarray(array, dtype=float).reshape(-1, 4)
+
+    @classmethod
+    def of(cls, colors:list[FloatColor]|Palette) -> Palette:
+        if isinstance(colors, Palette):
+            return colors
+        return Palette([color.toTuple() for color in colors])
+
+    @classmethod
+    def fromHexList(cls, input:str) -> Palette:
+        entries = [x.strip().strip('#') for x in input.split(',')]
+        for entry in entries:
+            if len(entry) not in (6, 8):
+                raise ValueError(f"Invalid hex color '{entry}'")
+
+        # Give every entry an alpha byte so the whole list decodes in one go
+        channels = np.frombuffer(bytes.fromhex(''.join(
+            entry if len(entry) == 8 else entry + 'ff'
+            for entry in entries
+        )), dtype=np.uint8)
+        return Palette(channels / 255)
 
-        # The steps between 0 and 1
-        substeps = list([
-            (s + 1)/(subcount + 1)
-            for s in range(subcount)
-        ])
+    def __len__(self) -> int:
+        return len(self.array)
 
-        # For every color
-        for i, current_color in enumerate(colors):
-            # Add the current color
-            full_colors.append(current_color)
+    def __getitem__(self, index:int|slice) -> FloatColor|Palette:
+        if isinstance(index, slice):
+            return Palette(self.array[index])
+        return FloatColor(*self.array[index].tolist())
 
-            # Get the next color
-            next_color = colors[(i + 1) % len(colors)]
+    def __iter__(self) -> typing.Iterator[FloatColor]:
+        for row in self.array.tolist():
+            yield FloatColor(*row)
 
-            # Get the difference between the two colors
-            color_delta = next_color - current_color
+    def __add__(self, other:list[FloatColor]|Palette) -> Palette:
+        return Palette(np.concatenate((self.array, Palette.of(other).array)))
 
-            # If this is the last color, and we're not wrapping
-            if i == len(colors) - 1 and not wrap:
-                # Stop
-                continue
+    def __radd__(self, other:list[FloatColor]) -> Palette:
+        # A list of colors in front of a palette, as configs wrote before getSubcolors returned palettes
+        return Palette.of(other) + self
 
-            # For every substep
-            for substep in substeps:
-                full_colors.append(current_color + (color_delta * substep))
-        return full_colors
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Palette) and np.array_equal(self.array, other.array)
+
+    def __repr__(self) -> str:
+        return f"Palette({self.array.tolist()})"
+
+    def getSubcolors(self, subcount:int, wrap=False) -> Palette:
+        """Insert `subcount` evenly spaced colors between each pair of neighbours"""
+        steps = np.arange(subcount + 1) / (subcount + 1)
+        deltas = np.roll(self.array, -1, axis=0) - self.array
+
+        # Each color followed by its substeps towards the next color
+        full = (self.array[:, np.newaxis, :] + deltas[:, np.newaxis, :] * steps[np.newaxis, :, np.newaxis]).reshape(-1, 4)
+
+        # Without wrapping the last color does not blend back into the first
+        if not wrap and len(full):
+            full = full[:len(full) - subcount]
+        return Palette(full)
+
+    def sample(self, positions:np.ndarray, wrap=False) -> np.ndarray:
+        """Interpolate colors at positions in [0, 1] along the palette, as an (N, 4) array"""
+        positions = np.asarray(positions, dtype=float)
+        count = len(self.array)
+        if wrap:
+            scaled = (positions % 1) * count
+        else:
+            scaled = np.clip(positions, 0, 1) * (count - 1)
+
+        lower = np.floor(scaled).astype(int)
+        fraction = (scaled - lower)[:, np.newaxis]
+        lower %= count
+        upper = (lower + 1) % count
+        return self.array[lower] + (self.array[upper] - self.array[lower]) * fraction
+
+    def subset(self, start:int=None, end:int=None) -> Palette:
+        return Palette(self.array[start:end])
+
+    def rotate(self, offset:int) -> Palette:
+        return Palette(np.roll(self.array, -offset, axis=0))
+
+    def reverse(self) -> Palette:
+        return Palette(self.array[::-1])
+
+    def shuffle(self) -> Palette:
+        # Shuffle the indices with `random` so a seed orders a palette like the equivalent list
+        order = list(range(len(self.array)))
+        random.shuffle(order)
+        return Palette(self.array[order])
 
 class Point(object):
+    __slots__ = ('x', 'y')
+
     def __init__(self, x:float, y:float):
         self.x = x
         self.y = y
 
     def distance(self, other:Point) -> float:
-        return dist((self.x, self.y), (other.x, other.y))
+        return math.hypot(self.x - other.x, self.y - other.y)
 
     def get_angle(self, other:Point):
-        shifted_point = other - self
-        return atan2(shifted_point.y, shifted_point.x)
+        return atan2(other.y - self.y, other.x - self.x)
 
     def as_tuple(self) -> tuple[float, float]:
         return (self.x, self.y)
 
-    def __eq__(self, other:Point) -> bool:
-        if other is not Point:
-            return False
-        return self.x == other.x and self.y == other.y
+    def __eq__(self, other: object) -> bool:
+        if type(other) is Point:
+            return self.x == other.x and self.y == other.y
+        return False
 
     def __hash__(self) -> int:
         return hash((self.x, self.y))
@@ -153,21 +258,54 @@ class Point(object):
             return Point(self.x * other, self.y * other)
 
     def __truediv__(self, other:Point) -> Point:
-        return self.__div__(other)
+        if isinstance(other, Point):
+            return Point(
+                self.x / other.x,
+                self.y / other.y
+            )
+        else:
+            return Point(self.x / other, self.y / other)
 
-    def __div__(self, other:Point) -> Point:
-        return Point(
-            self.x / other.x,
-            self.y / other.y
-        )
+    # In-place variants, for accumulating without a new point per step
+    def __iadd__(self, other:Point) -> Point:
+        self.x += other.x
+        self.y += other.y
+        return self
 
-    def __eq__(self, other: object) -> bool:
-        if type(other) is Point:
-            return self.x == other.x and self.y == other.y
-        return False
+    def __isub__(self, other:Point) -> Point:
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def __imul__(self, other:Point) -> Point:
+        if isinstance(other, Point):
+            self.x *= other.x
+            self.y *= other.y
+        else:
+            self.x *= other
+            self.y *= other
+        return self
+
+    def __itruediv__(self, other:Point) -> Point:
+        if isinstance(other, Point):
+            self.x /= other.x
+            self.y /= other.y
+        else:
+            self.x /= other
+            self.y /= other
+        return self
 
     def rotateAround(self, other:Point, angleRad:float) -> Point:
+        cos, sin = math.cos(angleRad), math.sin(angleRad)
+        deltaX, deltaY = self.x - other.x, self.y - other.y
         return Point(
-            math.cos(angleRad) * (self.x - other.x) - math.sin(angleRad) * (self.y - other.y) + other.x,
-            math.sin(angleRad) * (self.x - other.x) + math.cos(angleRad) * (self.y - other.y) + other.y
-        )
\ No newline at end of file
+            cos * deltaX - sin * deltaY + other.x,
+            sin * deltaX + cos * deltaY + other.y
+        )
+
+    def rotateAroundInPlace(self, other:Point, angleRad:float) -> Point:
+        cos, sin = math.cos(angleRad), math.sin(angleRad)
+        deltaX, deltaY = self.x - other.x, self.y - other.y
+        self.x = cos * deltaX - sin * deltaY + other.x
+        self.y = sin * deltaX + cos * deltaY + other.y
+        return self
\ No newline at end of file
@@ -1,18 +1,40 @@
-import math
+from __future__ import annotations
+import bisect
+import typing
 
-class Node[K,V]:
-    def __init__(self, key:K, value:V) -> None:
-        self.left:Node[K,V] = None
-        self.right:Node[K,V] = None
-        self.key:K = key
-        self.value:V = value
+import numpy as np
 
-class Tree[K,V]:
+K = typing.TypeVar('K')
+V = typing.TypeVar('V')
+
+class Tree(typing.Generic[K, V]):
+    """A piecewise constant lookup: searching a key finds the value of the greatest entry key at or below it.
+
+    Keys below the first entry get the first entry's value. Compiling sorts the entries into arrays,
+    which are then binary searched, one key at a time with search or many at once with searchMany.
+    """
     def __init__(self):
-        self.entries = dict[K,V]()
+        self.entries = dict[K, V]()
         self._compiled = False
 
-        self.root:Node[K,V] = None
+        self.keys:np.ndarray = None
+        self.values:list[V] = None
+
+        # The keys as a list for bisect, and the values as an array for vectorized lookups
+        self._sortedKeys:list[K] = None
+        self._valueArray:np.ndarray = None
+
+    @classmethod
+    def fromStops(cls, stops:list[float], count:int) -> Tree[float, int]:
+        """A lookup from positions to the index of the stop they fall after"""
+        if len(stops) != count:
+            raise ValueError(f"Expected {count} stops, got {len(stops)}")
+
+        tree = cls()
+        for index, stop in enumerate(stops):
+            tree.addEntry(stop, index)
+        tree.compile()
+        return tree
 
     def addEntry(self, key:K, value:V):
         if self._compiled:
@@ -22,73 +44,40 @@ class Tree[K,V]:
     def compile(self):
         if self._compiled:
             raise SyntaxError("Tree is already compiled")
-        
-        self.root = Tree._compile(self.entries)
+        if len(self.entries) == 0:
+            raise ValueError("Tree has no entries")
+
+        sortedKeys = sorted(self.entries.keys())
+        self.keys = np.array(sortedKeys)
+        self.values = [self.entries[key] for key in sortedKeys]
+        self._sortedKeys = sortedKeys
+        self._valueArray = np.array(self.values)
         self._compiled = True
 
-    def search(self, key:K) -> V:
+    def searchIndex(self, key:K) -> int:
+        """The position of the entry covering the key, in key order"""
         if not self._compiled:
             self.compile()
-        return Tree._search(key, self.root)
-
-    @staticmethod
-    def _search(key:K, node:Node[K,V]) -> V:
-        if node == None:
-            raise ValueError("Search found a non-existant node")
-        
-        if (node.left == None) and (node.right == None):
-            return node.value
-        else:
-            if key < node.key:
-                return Tree._search(key, node.left)
-            else:
-                return Tree._search(key, node.left)
-
-    @staticmethod
-    def _compile(entries:dict[K,V]) -> Node[K,V]:
-        if len(entries) == 0:
-            return None
-        elif len(entries) == 1:
-            item = entries.popitem()
-            return Node(item[0], item[1])
-        else:
-            sortedKeys = sorted(entries.keys())
-
-            if len(entries) == 2:
-                a = entries.popitem()
-                b = entries.popitem()
-
-                node = Node((a[0] + b[0]) / 2, None)
-
-                if a[0] < b[0]:
-                    node.left = Node(*a)
-                    node.right = Node(*b)
-                else:
-                    node.left = Node(*b)
-                    node.right = Node(*a)
-                return node
-            else:
-                medianKey = sortedKeys[math.floor(len(entries) / 2) ]
+        return max(bisect.bisect_right(self._sortedKeys, key) - 1, 0)
 
-                node = Node(medianKey, None)
-                node.left = Tree._compile(dict({k: v for k,v in entries.items() if k < medianKey }))
-                node.right = Tree._compile(dict({k: v for k,v in entries.items() if k >= medianKey }))
+    def search(self, key:K) -> V:
+        index = self.searchIndex(key)
+        return self.values[index]
+
+    def searchIndices(self, keys:np.ndarray) -> np.ndarray:
+        if not self._compiled:
+            self.compile()
+        return np.maximum(np.searchsorted(self.keys, keys, side='right') - 1, 0)
 
-                return node
+    def searchMany(self, keys:np.ndarray) -> np.ndarray:
+        indices = self.searchIndices(keys)
+        return self._valueArray[indices]
 
     def prettyPrint(self):
-        Tree._prettyPrint(self.root)
-
-    @staticmethod
-    def _prettyPrint(root:Node[K,V]=None, depth=0):
-        if not root:
-            return
-        prefix = "".join(["|" for _ in range(depth)])
-
-        if root.left == None and root.right == None:
-            print("{}{}".format(prefix, root.value))
-        else:
-            print("{}if X < {}:".format(prefix, root.key))
-            Tree._prettyPrint(root.left, depth+1)
-            print("{}if X >= {}:".format(prefix, root.key))
-            Tree._prettyPrint(root.right, depth+1)
+        if not self._compiled:
+            self.compile()
+        for i, value in enumerate(self.values):
+            if i + 1 < len(self.values):
+                print("if X < {}: {}".format(self._sortedKeys[i + 1], value))
+            else:
+                print("else: {}".format(value))
\ No newline at end of file
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+import random
+import typing
+
+class LRUCache():
+    """A bounded cache that evicts the least recently used entries, counting hits and misses.
+
+    A maxsize of None never evicts, and 0 disables caching.
+    """
+    def __init__(self, maxsize:int|None=32):
+        self.maxsize = maxsize
+        self.entries:OrderedDict[typing.Hashable, typing.Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key:typing.Hashable, build:typing.Callable[[], typing.Any]) -> typing.Any:
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        value = build()
+        if self.maxsize != 0:
+            self.entries[key] = value
+            self._evict()
+        return value
+
+    def getRandom(self, key:typing.Hashable, build:typing.Callable[[], typing.Any]) -> typing.Any:
+        """Like get, for builds that use the random module.
+
+        The random state is part of the key, and a hit leaves the random state where the build
+        would have, so everything after it still sees the same random numbers.
+        """
+        (value, state) = self.get((key, random.getstate()), lambda: (build(), random.getstate()))
+        random.setstate(state)
+        return value
+
+    def resize(self, maxsize:int|None) -> None:
+        self.maxsize = maxsize
+        self._evict()
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _evict(self) -> None:
+        if self.maxsize is None:
+            return
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+# Scipy geometry built by the modes, shared by every evaluation in the process
+geometryCache = LRUCache()
\ No newline at end of file
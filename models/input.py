@@ -1,8 +1,11 @@
 import itertools
 import math
 import random
+import re
 import typing
-import shlex
+
+from models import Palette
+from models.profiler import ProfileNode, Profiler
 
 class Token():
     pass
@@ -29,63 +32,159 @@ class FunctionToken(Token):
     def __repr__(self) -> str:
         return "{}({})".format(self.name, str.join(",", [x.__repr__() for x in self.args]))
 
+class InputReader():
+    """Splits input text into values the same way shlex does in posix mode, in a single regex pass.
+
+    Words are runs of word characters, quoted strings and escaped characters, any other character
+    is a value on its own, and # starts a comment. Positions are only worked out again for errors.
+    """
+    wordChars = (
+        'abcdfeghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_'
+        'ßàáâãäåæçèéêëìíîïðñòóôõöøùúûüýþÿÀÁÂÃÄÅÆÇÈÉÊËÌÍÎÏÐÑÒÓÔÕÖØÙÚÛÜÝÞ'
+    )
+
+    # Skip whitespace and comments, then take a word, a quote or backslash that never closes, any
+    # other single character, or the empty end of the text. The word always matches something, so
+    # nothing backtracks into the skipped text, and quoted text is taken a character at a time so a
+    # quote that never closes fails in linear time
+    pattern = re.compile(r"""
+        (?:[ \t\r\n]+|\#[^\n]*)*
+        (
+            (?:[{wordChars}]+|"(?:[^"\\]|\\.)*"|'[^']*'|\\.)+
+            |.
+            |\Z
+        )
+    """.format(wordChars=re.escape(wordChars)), re.VERBOSE | re.DOTALL)
+
+    piecePattern = re.compile(r"""
+        "(?P<double>(?:[^"\\]|\\.)*)"
+        |'(?P<single>[^']*)'
+        |\\(?P<escaped>.)
+        |(?P<plain>[^"'\\]+)
+    """, re.VERBOSE | re.DOTALL)
+
+    doubleEscapePattern = re.compile(r'\\(["\\])')
+    quotePattern = re.compile(r'["\'\\]')
+
+    def __init__(self, text:str):
+        self.text = text
+        self.index = 0
+
+        self.values:list[str] = self.pattern.findall(text)
+        while self.values and self.values[-1] == '':
+            self.values.pop()
+
+        for index, value in enumerate(self.values):
+            if self.quotePattern.search(value):
+                self.values[index] = self._unquote(value, index)
+
+    def _unquote(self, word:str, index:int) -> str:
+        if word == '\\':
+            raise self.error("No escaped character", index)
+        if word == '"' or word == "'":
+            raise self.error("No closing quotation", index)
+
+        parts = []
+        for piece in self.piecePattern.finditer(word):
+            kind = piece.lastgroup
+            if kind == 'double':
+                # Only quotes and backslashes can be escaped inside double quotes
+                parts.append(self.doubleEscapePattern.sub(r'\1', piece.group(kind)))
+            else:
+                parts.append(piece.group(kind))
+        return ''.join(parts)
+
+    def peek(self, ahead:int=0) -> str|None:
+        index = self.index + ahead
+        return self.values[index] if index < len(self.values) else None
+
+    def next(self) -> str|None:
+        value = self.peek()
+        self.index += 1
+        return value
+
+    def position(self, index:int) -> tuple[int, int]:
+        """The 1-based line and column of the value at index, or of the end of the text"""
+        offset = len(self.text)
+        for valueIndex, match in enumerate(self.pattern.finditer(self.text)):
+            if valueIndex == index:
+                offset = match.start(1)
+                break
+
+        line = self.text.count('\n', 0, offset) + 1
+        column = offset - (self.text.rfind('\n', 0, offset) + 1) + 1
+        return (line, column)
+
+    def error(self, message:str, index:int) -> ValueError:
+        line, column = self.position(index)
+        return ValueError(f"{message} at line {line}, column {column}")
+
 class InputParser():
     @classmethod
     def parse(cls, stream:typing.TextIO) -> list[Token]:
-        reader = shlex.shlex(stream, posix=True)
+        reader = InputReader(stream.read())
         tokens = []
         while token := cls._parseToken(reader):
             tokens.append(token)
         return tokens
 
     @classmethod
-    def _parseToken(cls, reader:shlex.shlex) -> Token:
-        value = reader.get_token()
+    def _parseToken(cls, reader:InputReader) -> Token:
+        values, index = reader.values, reader.index
 
-        if value == reader.eof:
+        if index >= len(values):
             return None
 
+        value = values[index]
+
         # If we have seen the start of an array
         if value == '[':
-            reader.push_token(value)
             return cls._parseArray(reader)
 
-        # Peek at the next token
-        nextValue = reader.get_token()
-        reader.push_token(nextValue)
-
         # If it's the start of a function
-        if nextValue == '(':
-            # Reset the name
-            reader.push_token(value)
+        if index + 1 < len(values) and values[index + 1] == '(':
             return cls._parseFunction(reader)
 
+        reader.index = index + 1
         return ValueToken(value)
 
     @classmethod
-    def _parseArray(cls, reader:shlex.shlex, start:str='[', end:str=']') -> ArrayToken:
+    def _parseArray(cls, reader:InputReader, start:str='[', end:str=']') -> ArrayToken:
         arrayToken = ArrayToken()
+        items = arrayToken.items
+        values, count = reader.values, len(reader.values)
 
         # Expect the first token to be [
-        startChar = reader.get_token()
+        startIndex = reader.index
+        startChar = reader.next()
         if startChar != start:
-            raise ValueError(f"Unexpected array start token {startChar}, expected {start}")
+            raise reader.error(f"Unexpected array start token {startChar}, expected {start}", startIndex)
 
         while True:
-            token = cls._parseToken(reader)
+            index = reader.index
+            if index >= count:
+                raise reader.error(f"Missing {end} to close the {start}", startIndex)
+
+            value = values[index]
 
-            if isinstance(token, ValueToken):
-                if token.value == end:
-                    return arrayToken
-                
-                if token.value == ',':
-                    continue
+            # Nested arrays and functions
+            if value == '[' or (index + 1 < count and values[index + 1] == '('):
+                items.append(cls._parseToken(reader))
+                continue
 
-            arrayToken.items.append(token)
+            reader.index = index + 1
+
+            if value == end:
+                return arrayToken
+
+            if value == ',':
+                continue
+
+            items.append(ValueToken(value))
 
     @classmethod
-    def _parseFunction(cls, reader:shlex.shlex) -> FunctionToken:
-        funcToken = FunctionToken(reader.get_token())
+    def _parseFunction(cls, reader:InputReader) -> FunctionToken:
+        funcToken = FunctionToken(reader.next())
         argsArray = cls._parseArray(reader, '(', ')')
         funcToken.args = argsArray.items
         return funcToken
@@ -128,6 +227,8 @@ def subset(array, start:int=None, end:int=None):
         return array[start:end]
 
 def rotate(array, offset:int):
+    if isinstance(array, Palette):
+        return array.rotate(offset)
     offset = offset % len(array)
     if offset == 0:
         return array
@@ -135,15 +236,70 @@ def rotate(array, offset:int):
     return array[offset:] + array[:end]
 
 def reverse(array:list):
+    if isinstance(array, Palette):
+        return array.reverse()
     reversed = list(array)
     reversed.reverse()
     return reversed
 
 def shuffle(array:list):
+    if isinstance(array, Palette):
+        return array.shuffle()
     shuffled = list(array)
     random.shuffle(shuffled)
     return shuffled
 
+class ReuseCache():
+    """Objects built by the last run of a program, for the next run to reuse where its tokens are unchanged.
+
+    Objects are keyed by the tokens that built them plus how many times those tokens have already
+    been seen during the run, so repeated identical calls still get their own objects. Each object
+    keeps the `random` state from before and after it was built. Objects whose build drew random
+    numbers are only reused from the same state, and then leave `random` where a rebuild would have,
+    so e.g. changing the seed builds them again.
+    """
+    def __init__(self):
+        self.previous:dict[tuple, tuple[typing.Any, tuple, tuple]] = dict()
+        self.current:dict[tuple, tuple[typing.Any, tuple, tuple]] = dict()
+        self.seen:dict[tuple, int] = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def begin(self) -> None:
+        self.current = dict()
+        self.seen = dict()
+
+    def end(self) -> None:
+        # Only keep what this run used
+        self.previous = self.current
+        self.current = dict()
+
+    def clear(self) -> None:
+        self.previous = dict()
+
+    def get(self, key:tuple, build:typing.Callable[[], typing.Any]) -> typing.Any:
+        occurrence = self.seen.get(key, 0)
+        self.seen[key] = occurrence + 1
+
+        fullKey = (key, occurrence)
+        state = random.getstate()
+        entry = self.previous.get(fullKey)
+        if entry and entry[1] == state:
+            self.hits += 1
+            (value, before, after) = entry
+            random.setstate(after)
+        elif entry and entry[1] == entry[2]:
+            # Built without drawing random numbers, so reusable from any state
+            self.hits += 1
+            value = entry[0]
+            (before, after) = (state, state)
+        else:
+            self.misses += 1
+            value = build()
+            (before, after) = (state, random.getstate())
+        self.current[fullKey] = (value, before, after)
+        return value
+
 class InputEvaluator():
     commonFunctuons = [
         add,
@@ -168,50 +324,133 @@ class InputEvaluator():
         shuffle,
     ]
 
-    def __init__(self, knownFunctions:list[typing.Callable], valueParser:typing.Callable[[str], typing.Any]=None) -> None:
+    # Functions that can give a different result for the same arguments
+    impureFunctions = [
+        Incrementer.incremental,
+        Incrementer.incrementIndex,
+        Incrementer.getIncrementIndex,
+        random.random,
+        random.seed,
+        random.choice,
+        random.randint,
+        shuffle,
+    ]
+
+    def __init__(self, knownFunctions:list[typing.Callable], valueParser:typing.Callable[[str], typing.Any]=None, reusableFunctions:list[typing.Callable]=[]) -> None:
         self.knownFunctions = {
             x.__name__: x
             for x in itertools.chain(self.commonFunctuons, knownFunctions)
         }
         self.valueParser = valueParser
 
+        # Functions whose results can be kept between runs when built from unchanged tokens
+        self.reusableFunctions = set(reusableFunctions)
+
     def parse(self, tokens:list[Token]) -> None:
-        for token in tokens:
-            self._flatten(token)
+        self.compile(tokens)()
 
-    def _flatten(self, token:Token):
-        if isinstance(token, FunctionToken):
-            if token.name in self.knownFunctions:
-                return self.knownFunctions[token.name](*[self._flatten(x) for x in token.args])
+    def compile(self, tokens:list[Token], reuse:ReuseCache=None, profiler:Profiler=None) -> typing.Callable[[], None]:
+        """Turn the tokens into a program that can be run many times without walking the tokens again.
+
+        With a reuse cache, calls to reusable functions whose tokens contain nothing impure return
+        the object built for the same tokens by the last run of any program using that cache.
+
+        With a profiler, every function token is timed under a node of the profiler's tree. Without
+        one, the program is built exactly as if profiling did not exist.
+        """
+        node = profiler.root if profiler else None
+        statements = [self._compile(token, reuse, node)[0] for token in tokens]
+
+        def program():
+            for statement in statements:
+                statement()
+
+        if node is not None:
+            program = node.time(program)
 
-            raise ValueError(f"Unknown function {token.name}")
+        if reuse is None:
+            return program
+
+        def reusingProgram():
+            reuse.begin()
+            program()
+            reuse.end()
+        return reusingProgram
+
+    def _compile(self, token:Token, reuse:ReuseCache=None, node:ProfileNode=None) -> tuple[typing.Callable[[], typing.Any], tuple|None]:
+        """Compile a token, returning its closure and a key describing it, or None if it is impure"""
+        if isinstance(token, FunctionToken):
+            if token.name not in self.knownFunctions:
+                raise ValueError(f"Unknown function {token.name}")
+
+            function = self.knownFunctions[token.name]
+            if node is not None:
+                node = node.add(token.name)
+            compiled = [self._compile(x, reuse, node) for x in token.args]
+            args = [x[0] for x in compiled]
+
+            key = None
+            if function not in self.impureFunctions and all(x[1] is not None for x in compiled):
+                key = ('function', token.name, tuple(x[1] for x in compiled))
+
+            # Avoid building an argument list for the common short calls
+            if len(args) == 0:
+                call = function
+            elif len(args) == 1:
+                (first,) = args
+                call = lambda: function(first())
+            elif len(args) == 2:
+                (first, second) = args
+                call = lambda: function(first(), second())
+            else:
+                call = lambda: function(*[x() for x in args])
+
+            if reuse is not None and key is not None and function in self.reusableFunctions:
+                uncached = call
+                call = lambda: reuse.get(key, uncached)
+
+            if node is not None:
+                call = node.build(call)
+            return (call, key)
 
         if isinstance(token, ArrayToken):
-            return list([self._flatten(x) for x in token.items])
+            compiled = [self._compile(x, reuse, node) for x in token.items]
+            items = [x[0] for x in compiled]
+
+            key = None
+            if all(x[1] is not None for x in compiled):
+                key = ('array', tuple(x[1] for x in compiled))
+
+            # A new list every run, in case whatever gets it holds on to it
+            return (lambda: [x() for x in items], key)
 
         if isinstance(token, ValueToken):
-            if token.value == "$None":
-                return None
-            elif token.value == "$true":
-                return True
-            elif token.value == "$false":
-                return False
-
-            if self.valueParser:
-                parsedValue = self.valueParser(token.value)
-                if parsedValue:
-                    return parsedValue
-
-            try:
-                return int(token.value)
-            except:
-                pass
-
-            try:
-                return float(token.value)
-            except:
-                pass
-
-            return token.value
-
-        raise NotImplementedError()
\ No newline at end of file
+            value = self._parseValue(token.value)
+            return (lambda: value, ('value', token.value))
+
+        raise NotImplementedError()
+
+    def _parseValue(self, value:str) -> typing.Any:
+        if value == "$None":
+            return None
+        elif value == "$true":
+            return True
+        elif value == "$false":
+            return False
+
+        if self.valueParser:
+            parsedValue = self.valueParser(value)
+            if parsedValue:
+                return parsedValue
+
+        try:
+            return int(value)
+        except:
+            pass
+
+        try:
+            return float(value)
+        except:
+            pass
+
+        return value
\ No newline at end of file
@@ -0,0 +1,60 @@
+import math
+
+import numpy as np
+
+# Coordinates are snapped to this many steps per unit before hashing, so results that differ in
+# the last bit (e.g. from SIMD and scalar math paths) still land on the same value
+QUANTIZE = float(1 << 24)
+MASK = 0xFFFFFFFFFFFFFFFF
+
+def _mix(values:np.ndarray) -> np.ndarray:
+    """The SplitMix64 finalizer, a cheap avalanche over uint64 arrays"""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+def _mixInt(value:int) -> int:
+    """_mix on a single value, with plain ints wrapped to 64 bits"""
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+def hashUniform(seed:int, xs:np.ndarray, ys:np.ndarray, stream:int=0) -> np.ndarray:
+    """Uniform values in [0, 1) that only depend on the seed, stream and each point.
+
+    Unlike drawing from a shared generator, the value for a point does not depend on which other
+    points are evaluated or in what order, so tiled and chunked renders match whole renders.
+    """
+    with np.errstate(over='ignore'):
+        xBits = np.round(np.asarray(xs, dtype=float) * QUANTIZE).astype(np.int64).view(np.uint64)
+        yBits = np.round(np.asarray(ys, dtype=float) * QUANTIZE).astype(np.int64).view(np.uint64)
+
+        values = _mix(xBits ^ np.uint64((seed + stream * 0x9E3779B97F4A7C15) & MASK))
+        values = _mix(values ^ yBits)
+
+    # The top 53 bits make an evenly spread double
+    return (values >> np.uint64(11)).astype(float) * (1.0 / (1 << 53))
+
+def hashNormal(seed:int, xs:np.ndarray, ys:np.ndarray, sigma:float, stream:int=0) -> np.ndarray:
+    """Normally distributed values that only depend on the seed, stream and each point"""
+    first = hashUniform(seed, xs, ys, stream * 2)
+    second = hashUniform(seed, xs, ys, stream * 2 + 1)
+
+    # Box-Muller
+    return np.sqrt(-2 * np.log1p(-first)) * np.cos(2 * np.pi * second) * sigma
+
+def hashUniformPoint(seed:int, x:float, y:float, stream:int=0) -> float:
+    """hashUniform for one point, without the cost of numpy on one element arrays"""
+    xBits = round(x * QUANTIZE) & MASK
+    yBits = round(y * QUANTIZE) & MASK
+
+    value = _mixInt(xBits ^ ((seed + stream * 0x9E3779B97F4A7C15) & MASK))
+    value = _mixInt(value ^ yBits)
+    return (value >> 11) * (1.0 / (1 << 53))
+
+def hashNormalPoint(seed:int, x:float, y:float, sigma:float, stream:int=0) -> float:
+    """hashNormal for one point"""
+    first = hashUniformPoint(seed, x, y, stream * 2)
+    second = hashUniformPoint(seed, x, y, stream * 2 + 1)
+    # numpy's log1p can round differently to math's, so use it here too to match hashNormal exactly
+    return math.sqrt(-2 * float(np.log1p(-first))) * math.cos(2 * math.pi * second) * sigma
\ No newline at end of file
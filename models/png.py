@@ -0,0 +1,68 @@
+from __future__ import annotations
+import struct
+import typing
+import zlib
+
+import numpy as np
+
+class PngWriter(object):
+    """Writes an 8 bit RGBA PNG a band of rows at a time, so the whole image never has to be in memory"""
+    signature = b'\x89PNG\r\n\x1a\n'
+
+    # Compressed bytes held back before writing an IDAT chunk
+    chunkSize = 1 << 16
+
+    def __init__(self, stream:typing.BinaryIO, width:int, height:int, level:int=6):
+        self.stream = stream
+        self.width = width
+        self.height = height
+        self.rowsWritten = 0
+
+        self.compressor = zlib.compressobj(level)
+        self.pending = bytearray()
+
+        # The row above the next one, for the Up filter
+        self.previousRow = np.zeros((width, 4), dtype=np.uint8)
+
+        self.stream.write(self.signature)
+        self._writeChunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+
+    def __enter__(self) -> PngWriter:
+        return self
+
+    def __exit__(self, *exception) -> None:
+        if exception[0] is None:
+            self.close()
+
+    def _writeChunk(self, kind:bytes, data:bytes) -> None:
+        self.stream.write(struct.pack('>I', len(data)))
+        self.stream.write(kind)
+        self.stream.write(data)
+        self.stream.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+    def writeRows(self, rows:np.ndarray) -> None:
+        """Write a (height, width, 4) block of straight RGBA rows"""
+        if self.rowsWritten + len(rows) > self.height:
+            raise ValueError("More rows than the image height")
+        if len(rows) == 0:
+            return
+
+        # Up filter every row, i.e. store each row's difference from the one above
+        above = np.concatenate((self.previousRow[np.newaxis], rows[:-1]))
+        filtered = np.empty((len(rows), self.width * 4 + 1), dtype=np.uint8)
+        filtered[:, 0] = 2
+        filtered[:, 1:] = (rows - above).reshape(len(rows), -1)
+        self.previousRow = rows[-1].copy()
+        self.rowsWritten += len(rows)
+
+        self.pending += self.compressor.compress(filtered.tobytes())
+        if len(self.pending) >= self.chunkSize:
+            self._writeChunk(b'IDAT', bytes(self.pending))
+            self.pending = bytearray()
+
+    def close(self) -> None:
+        if self.rowsWritten != self.height:
+            raise ValueError(f"Wrote {self.rowsWritten} of {self.height} rows")
+        self.pending += self.compressor.flush()
+        self._writeChunk(b'IDAT', bytes(self.pending))
+        self._writeChunk(b'IEND', b'')
\ No newline at end of file
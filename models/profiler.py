@@ -0,0 +1,88 @@
+from __future__ import annotations
+import time
+import typing
+
+class ProfileNode():
+    """Call count and cumulative seconds for one function token, or one method of the object it built"""
+    def __init__(self, name:str, profiler:Profiler):
+        self.name = name
+        self.profiler = profiler
+        self.calls = 0
+        self.seconds = 0.0
+        self.children:list[ProfileNode] = []
+
+    def add(self, name:str) -> ProfileNode:
+        node = ProfileNode(name, self.profiler)
+        self.children.append(node)
+        return node
+
+    def get(self, name:str) -> ProfileNode:
+        for child in self.children:
+            if child.name == name:
+                return child
+        return self.add(name)
+
+    def time(self, function:typing.Callable) -> typing.Callable:
+        """Wrap a function so every call is counted and timed against this node"""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds += time.perf_counter() - start
+                self.calls += 1
+        return timed
+
+    def build(self, function:typing.Callable[[], typing.Any]) -> typing.Callable[[], typing.Any]:
+        """Wrap a token's closure, timing it and instrumenting the object it returns"""
+        timed = self.time(function)
+        def built():
+            value = timed()
+            self.profiler.instrument(value, self)
+            return value
+        return built
+
+class Profiler():
+    """Profiles a program as a tree mirroring its tokens.
+
+    Every function token gets a node, and the objects of the given types that a token builds have
+    the named methods timed as children of its node, for as long as the profile runs.
+    """
+    def __init__(self, types:list[type]=[], methods:list[str]=[]):
+        self.root = ProfileNode('program', self)
+        self.types = tuple(types)
+        self.methods = methods
+
+        # Instances with timed methods, to put back afterwards
+        self.instrumented:list[tuple[typing.Any, str]] = []
+
+    def instrument(self, value:typing.Any, node:ProfileNode) -> None:
+        if not isinstance(value, self.types):
+            return
+
+        for name in self.methods:
+            # Always wrap the class's method, so objects built again replace the old timing
+            method = getattr(type(value), name, None)
+            if method is None:
+                continue
+            setattr(value, name, node.get(name).time(method.__get__(value)))
+            self.instrumented.append((value, name))
+
+    def restore(self) -> None:
+        """Remove the timing from every instrumented object, so they run at full speed again"""
+        for (value, name) in self.instrumented:
+            value.__dict__.pop(name, None)
+        self.instrumented = []
+
+    def format(self) -> str:
+        lines:list[str] = []
+        def _format(node:ProfileNode, depth:int):
+            # Leave out methods that were never called
+            if node.calls == 0:
+                return
+            label = "  " * depth + node.name
+            lines.append(f"{label:<50} {node.calls:>9} {node.seconds:>10.4f}s")
+            for child in node.children:
+                _format(child, depth + 1)
+        _format(self.root, 0)
+        return "\n".join(lines)
\ No newline at end of file
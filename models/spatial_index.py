@@ -0,0 +1,80 @@
+import math
+import typing
+
+import numpy as np
+
+class GridIndex():
+    """A uniform grid over axis-aligned bounding boxes, used to find which boxes may contain a point.
+
+    Boxes are given as rows of (minX, minY, maxX, maxY). Candidates are always returned in box order,
+    so callers that need first-match-wins semantics can rely on the order.
+    """
+    def __init__(self, bounds:np.ndarray, resolution:int=None):
+        bounds = np.asarray(bounds, dtype=float).reshape(-1, 4)
+        self.count = len(bounds)
+        self.resolution = resolution or max(1, math.ceil(math.sqrt(self.count)))
+
+        if self.count == 0:
+            self.minBound = np.zeros(2)
+            self.maxBound = np.zeros(2)
+        else:
+            self.minBound = bounds[:, :2].min(axis=0)
+            self.maxBound = bounds[:, 2:].max(axis=0)
+        extent = self.maxBound - self.minBound
+        self.cellSize = np.where(extent > 0, extent / self.resolution, 1)
+
+        # The boxes overlapping every cell, in box order
+        self.cells:list[list[int]] = [list() for _ in range(self.resolution * self.resolution)]
+        # The cells every box overlaps
+        self.boxCells:list[np.ndarray] = []
+
+        for index, (minX, minY, maxX, maxY) in enumerate(bounds):
+            startX, startY = self._cellCoords(minX, minY)
+            endX, endY = self._cellCoords(maxX, maxY)
+            boxCells = [
+                cellY * self.resolution + cellX
+                for cellY in range(startY, endY + 1)
+                for cellX in range(startX, endX + 1)
+            ]
+            for cell in boxCells:
+                self.cells[cell].append(index)
+            self.boxCells.append(np.array(boxCells, dtype=int))
+
+    def _cellCoords(self, x:float, y:float) -> tuple[int, int]:
+        # The same arithmetic as cellIds, as // can land on the other side of a cell boundary
+        cellX = min(math.floor((x - self.minBound[0]) / self.cellSize[0]), self.resolution - 1)
+        cellY = min(math.floor((y - self.minBound[1]) / self.cellSize[1]), self.resolution - 1)
+        return (cellX, cellY)
+
+    def cellIds(self, xs:np.ndarray, ys:np.ndarray) -> np.ndarray:
+        """The cell containing every point, or -1 for points outside the grid"""
+        cellXs = np.minimum(np.floor((xs - self.minBound[0]) / self.cellSize[0]), self.resolution - 1)
+        cellYs = np.minimum(np.floor((ys - self.minBound[1]) / self.cellSize[1]), self.resolution - 1)
+        outside = (xs < self.minBound[0]) | (xs > self.maxBound[0]) | (ys < self.minBound[1]) | (ys > self.maxBound[1])
+        return np.where(outside | (self.count == 0), -1, cellYs * self.resolution + cellXs).astype(int)
+
+    def candidates(self, x:float, y:float) -> list[int]:
+        """The boxes that may contain a single point, in box order"""
+        if self.count == 0 or x < self.minBound[0] or x > self.maxBound[0] or y < self.minBound[1] or y > self.maxBound[1]:
+            return []
+        cellX, cellY = self._cellCoords(x, y)
+        return self.cells[cellY * self.resolution + cellX]
+
+    def query(self, xs:np.ndarray, ys:np.ndarray) -> typing.Iterator[tuple[int, np.ndarray]]:
+        """For every box in order, yield the indices of the points sharing a cell with it"""
+        cellIds = self.cellIds(xs, ys)
+        inside = np.flatnonzero(cellIds >= 0)
+
+        # Group the points by cell
+        order = inside[np.argsort(cellIds[inside], kind='stable')]
+        counts = np.bincount(cellIds[inside], minlength=len(self.cells))
+        starts = np.concatenate(([0], np.cumsum(counts)))
+
+        for index, boxCells in enumerate(self.boxCells):
+            boxCells = boxCells[counts[boxCells] > 0]
+            if len(boxCells) == 0:
+                continue
+            if len(boxCells) == 1:
+                yield (index, order[starts[boxCells[0]]:starts[boxCells[0] + 1]])
+            else:
+                yield (index, np.concatenate([order[starts[cell]:starts[cell + 1]] for cell in boxCells]))
\ No newline at end of file
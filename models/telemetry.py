@@ -0,0 +1,106 @@
+from __future__ import annotations
+import json
+import time
+import tracemalloc
+import typing
+
+from models import FloatColor, Palette, Point
+
+class Telemetry():
+    """Measures the memory a render takes: its peak traced memory, how many of each model object it
+    creates, and the size of the largest surface it draws to.
+
+    Objects are counted by wrapping their classes' `__init__` while measuring, so counting costs
+    nothing outside of it. Surfaces are allocated by cairo rather than Python, so tracemalloc does
+    not see them and they are recorded separately.
+    """
+    def __init__(self, types:list[type]=[FloatColor, Palette, Point]):
+        self.types = types
+        self.counts:dict[str, int] = {}
+        self.peak = 0
+        self.seconds = 0.0
+        self.surface:dict[str, int]|None = None
+
+        self._startTime = 0.0
+        self._startedTracing = False
+        # Each class's own __init__ before counting, or None when it inherited one
+        self._originals:dict[type, typing.Any] = {}
+
+    def start(self) -> None:
+        self._startedTracing = not tracemalloc.is_tracing()
+        if self._startedTracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+        for cls in self.types:
+            self._originals[cls] = cls.__dict__.get('__init__')
+            cls.__init__ = self._counter(cls)
+        self._startTime = time.perf_counter()
+
+    def stop(self) -> None:
+        self.seconds += time.perf_counter() - self._startTime
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        if self._startedTracing:
+            tracemalloc.stop()
+
+        for (cls, original) in self._originals.items():
+            if original is None:
+                del cls.__init__
+            else:
+                cls.__init__ = original
+        self._originals = {}
+
+    def __enter__(self) -> Telemetry:
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _counter(self, cls:type) -> typing.Callable:
+        init = cls.__init__
+        counts = self.counts
+        def __init__(value, *args, **kwargs):
+            name = type(value).__name__
+            counts[name] = counts.get(name, 0) + 1
+            init(value, *args, **kwargs)
+        return __init__
+
+    def recordSurface(self, surface) -> None:
+        """Keep the size of the surface if it is the largest so far"""
+        description = Telemetry.describeSurface(surface)
+        if self.surface is None or description['bytes'] > self.surface['bytes']:
+            self.surface = description
+
+    @staticmethod
+    def describeSurface(surface) -> dict[str, int]:
+        return {'width': surface.get_width(), 'height': surface.get_height(), 'stride': surface.get_stride(), 'bytes': surface.get_stride() * surface.get_height()}
+
+    def toDict(self) -> dict[str, typing.Any]:
+        return {
+            'seconds': self.seconds,
+            'peakBytes': self.peak,
+            'allocations': {cls.__name__: self.counts.get(cls.__name__, 0) for cls in self.types} | self.counts,
+            'surface': self.surface,
+        }
+
+    def toJson(self) -> str:
+        return json.dumps(self.toDict())
+
+    @staticmethod
+    def combine(reports:list[dict[str, typing.Any]]) -> dict[str, typing.Any]:
+        """Combine the reports of parts of one render made in separate processes.
+
+        Each process has its own memory, so the peak is the largest of them, and allocations add up.
+        """
+        allocations:dict[str, int] = {}
+        for report in reports:
+            for (name, count) in report['allocations'].items():
+                allocations[name] = allocations.get(name, 0) + count
+        surfaces = [report['surface'] for report in reports if report['surface']]
+        return {
+            'seconds': max((report['seconds'] for report in reports), default=0.0),
+            'peakBytes': max((report['peakBytes'] for report in reports), default=0),
+            'allocations': allocations,
+            'surface': max(surfaces, key=lambda surface: surface['bytes'], default=None),
+        }
\ No newline at end of file
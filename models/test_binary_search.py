@@ -0,0 +1,30 @@
+import unittest
+
+import numpy as np
+
+from models.binary_search import Tree
+
+
+class TreeUnitTests(unittest.TestCase):
+    def test_search(self):
+        tree = Tree()
+        tree.addEntry(0.5, "b")
+        tree.addEntry(0, "a")
+        tree.addEntry(0.9, "c")
+
+        self.assertEqual(["a", "a", "b", "b", "c", "c"], [tree.search(key) for key in (-1, 0.2, 0.5, 0.7, 0.9, 2)])
+
+    def test_search_many(self):
+        tree = Tree.fromStops([0, 0.1, 0.6], 3)
+        keys = np.array([0, 0.05, 0.1, 0.3, 0.6, 1])
+
+        self.assertEqual([0, 0, 1, 1, 2, 2], tree.searchMany(keys).tolist())
+        self.assertEqual([tree.search(key) for key in keys], tree.searchMany(keys).tolist())
+
+    def test_compiled(self):
+        tree = Tree()
+        tree.addEntry(0, "a")
+        tree.compile()
+
+        with self.assertRaises(SyntaxError):
+            tree.addEntry(1, "b")
\ No newline at end of file
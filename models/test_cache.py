@@ -0,0 +1,52 @@
+import random
+import unittest
+
+from models.cache import LRUCache
+
+
+class LRUCacheUnitTests(unittest.TestCase):
+    def test_hit(self):
+        cache = LRUCache(2)
+
+        self.assertEqual(1, cache.get("a", lambda: 1))
+        self.assertEqual(1, cache.get("a", lambda: 2))
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_eviction(self):
+        cache = LRUCache(2)
+
+        cache.get("a", lambda: 1)
+        cache.get("b", lambda: 2)
+        cache.get("a", lambda: 1)
+        cache.get("c", lambda: 3)
+
+        # b was the least recently used
+        self.assertEqual(["a", "c"], list(cache.entries.keys()))
+
+        cache.resize(1)
+        self.assertEqual(["c"], list(cache.entries.keys()))
+
+    def test_disabled(self):
+        cache = LRUCache(0)
+
+        cache.get("a", lambda: 1)
+        self.assertEqual(0, len(cache))
+
+    def test_random(self):
+        cache = LRUCache(2)
+
+        random.seed(1)
+        first = cache.getRandom("points", lambda: [random.random() for _ in range(3)])
+        after = random.random()
+
+        random.seed(1)
+        second = cache.getRandom("points", lambda: self.fail("Should not rebuild"))
+
+        self.assertIs(first, second)
+        self.assertEqual(after, random.random())
+
+        # A different random state is a different entry
+        cache.getRandom("points", lambda: [random.random() for _ in range(3)])
+        self.assertEqual(2, cache.misses)
\ No newline at end of file
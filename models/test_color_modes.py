@@ -0,0 +1,105 @@
+import random
+import unittest
+
+import numpy as np
+
+from color_modes import ColorMode
+from color_modes.arc import ArcColorMode
+from color_modes.gradient import GradientColorMode
+from color_modes.grid import GridColorMode
+from color_modes.linear_gradient import LinearGradientColorMode
+from color_modes.polygon import PolygonColorMode
+from color_modes.random import RandomColorMode
+from color_modes.modify.avg import AvgColorMode
+from color_modes.modify.clamp import ClampColorMode
+from color_modes.modify.globe import GlobeColorMode
+from color_modes.modify.invert import InvertColorMode
+from color_modes.modify.normal import NormalColorMode
+from color_modes.modify.transform import TransformColorMode
+from color_modes.modify.voronoi import VoronoiColorMode
+from models import FloatColor, Palette
+
+
+class ColorModeUnitTests(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        generator = np.random.default_rng(0)
+        self.xs = generator.uniform(0.05, 0.95, 500)
+        self.ys = generator.uniform(0.05, 0.95, 500)
+        self.colors = Palette.fromHexList("#FF0000, #00FF0080, #0000FF, #FFFF00, #00FFFF, #FF00FF, #000000, #FFFFFF, #808080")
+
+    def getModes(self) -> list[ColorMode]:
+        square = [(0.1, 0.1), (0.6, 0.1), (0.6, 0.6), (0.1, 0.6)]
+        overlapping = [(0.4, 0.4), (0.9, 0.4), (0.9, 0.9), (0.4, 0.9)]
+        return [
+            GradientColorMode(self.colors),
+            GradientColorMode(self.colors, 1),
+            GradientColorMode(self.colors, 2, [0, 0.1, 0.2, 0.3, 0.5, 0.6, 0.7, 0.8, 0.9]),
+            GridColorMode(self.colors),
+            ArcColorMode(self.colors),
+            RandomColorMode(self.colors),
+            LinearGradientColorMode(),
+            PolygonColorMode([(self.colors[0], square), (GradientColorMode(self.colors), overlapping)]),
+            ClampColorMode(GradientColorMode(self.colors)),
+            InvertColorMode(ArcColorMode(self.colors)),
+            # Clear points still invert to a color
+            InvertColorMode(TransformColorMode(GradientColorMode(self.colors), 0.3, 0, 0.5, 1)),
+            InvertColorMode(ClampColorMode(GradientColorMode(self.colors), 0.6)),
+            # Gradients run past their last color far outside the canvas, so only nudge the points
+            NormalColorMode(GradientColorMode(self.colors), 0.02, 0.02),
+            NormalColorMode(GridColorMode(self.colors), 0.3, 0.3),
+            TransformColorMode(ArcColorMode(self.colors), 0.1, 0.2, 2, 0.5, 30),
+            AvgColorMode(LinearGradientColorMode(), RandomColorMode(self.colors)),
+            GlobeColorMode(GridColorMode(self.colors)),
+            VoronoiColorMode(RandomColorMode(self.colors), 20),
+        ]
+
+    def test_batched(self):
+        # Batches match asking for every point alone
+        for mode in self.getModes():
+            with self.subTest(mode=mode):
+                expected = [mode.getColor(x, y).toTuple() for (x, y) in zip(self.xs.tolist(), self.ys.tolist())]
+                np.testing.assert_allclose(mode.getColors(self.xs, self.ys), expected, atol=1e-12)
+
+    def test_indices(self):
+        # Indexed draws paint the same colors as direct draws, apart from clear points
+        for mode in self.getModes():
+            palette = mode.getPalette()
+            if palette is None:
+                continue
+            with self.subTest(mode=mode):
+                indices = mode.getIndices(self.xs, self.ys)
+                drawn = indices >= 0
+                np.testing.assert_array_equal(palette.array[indices[drawn]], mode.getColors(self.xs, self.ys)[drawn])
+
+    def test_invert_clear(self):
+        # Inverting clear points paints them, so indexed draws must too
+        for mode in [
+            InvertColorMode(TransformColorMode(GradientColorMode(self.colors), 0.3, 0, 0.5, 1)),
+            InvertColorMode(ClampColorMode(GradientColorMode(self.colors), 0.6)),
+        ]:
+            with self.subTest(mode=mode):
+                self.assertTrue((mode.child.getIndices(self.xs, self.ys) < 0).any())
+                indices = mode.getIndices(self.xs, self.ys)
+                self.assertTrue((indices >= 0).all())
+                np.testing.assert_array_equal(mode.getPalette().array[indices], mode.getColors(self.xs, self.ys))
+
+    def test_polygon_first_match(self):
+        square = [(0.1, 0.1), (0.6, 0.1), (0.6, 0.6), (0.1, 0.6)]
+        overlapping = [(0.4, 0.4), (0.9, 0.4), (0.9, 0.9), (0.4, 0.9)]
+        mode = PolygonColorMode([(self.colors[0], square), (self.colors[2], overlapping)])
+
+        # The overlap belongs to the polygon listed first
+        colors = mode.getColors(np.array([0.5, 0.8, 0.95]), np.array([0.5, 0.8, 0.95]))
+        np.testing.assert_array_equal([self.colors.array[0], self.colors.array[2], [0, 0, 0, 0]], colors)
+        self.assertEqual(self.colors[0].toTuple(), mode.getColor(0.5, 0.5).toTuple())
+
+    def test_voronoi_seed_colors(self):
+        child = GradientColorMode(self.colors)
+        mode = VoronoiColorMode(child, 20)
+
+        # Every point takes the color of its nearest seed
+        (_, nearest) = mode.tree.query(np.column_stack((self.xs, self.ys)))
+        seeds = mode.tree.data[nearest]
+        np.testing.assert_array_equal(child.getColors(seeds[:, 0], seeds[:, 1]), mode.getColors(self.xs, self.ys))
+        self.assertLessEqual(len(np.unique(mode.getColors(self.xs, self.ys), axis=0)), 20)
\ No newline at end of file
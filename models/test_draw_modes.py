@@ -0,0 +1,149 @@
+from __future__ import annotations
+import math
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+
+try:
+    import cairo
+    from draw_modes import IndexEncoder, IndexRaster, PixelBuffer, toPixels
+    from draw_modes.circles import CirclesDrawMode
+    from draw_modes.squares import SquaresDrawMode
+
+    class RecordingContext(cairo.Context):
+        """Keeps every circle drawn, with the color it was filled with"""
+        def __init__(self, surface:cairo.Surface):
+            super().__init__(surface)
+            self.source = None
+            self.path = []
+            self.fills = []
+
+        def set_source_rgba(self, *color):
+            self.source = color
+
+        def arc(self, *circle):
+            self.path.append(circle)
+
+        def fill(self):
+            self.fills.append((self.source, self.path))
+            self.path = []
+except ImportError:
+    cairo = None
+
+from color_modes.random import RandomColorMode
+from models import Palette
+
+
+@unittest.skipIf(cairo is None, "pycairo is not installed")
+class SquaresDrawModeUnitTests(unittest.TestCase):
+    def render(self, width:int, height:int, count:int, translate:tuple[int, int]=(0, 0)) -> bytes:
+        random.seed(0)
+        colorMode = RandomColorMode(Palette.fromHexList("#FF0000, #00FF00, #0000FF, #FFFFFF"))
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+        context = cairo.Context(surface)
+        context.translate(*translate)
+        SquaresDrawMode(count).draw(context, colorMode, width, height)
+        surface.flush()
+        return bytes(surface.get_data())
+
+    def test_buffer_matches_cairo(self):
+        # Sizes the cells do not divide evenly, so cells overlap by a pixel
+        for (width, height, count, translate) in [(100, 100, 7, (0, 0)), (64, 48, 5, (0, 0)), (90, 90, 11, (-13, 7))]:
+            with self.subTest(width=width, height=height, count=count, translate=translate):
+                expected = None
+                with mock.patch.object(PixelBuffer, 'fromContext', return_value=None):
+                    expected = self.render(width, height, count, translate)
+                self.assertEqual(expected, self.render(width, height, count, translate))
+
+
+@unittest.skipIf(cairo is None, "pycairo is not installed")
+class IndexRasterUnitTests(unittest.TestCase):
+    def test_encode(self):
+        indices = np.array([-1, 0, 1, 300, 70000])
+        colors = IndexEncoder.encode(indices)
+
+        # Clear points are transparent, and the rest are opaque with index + 1 in their RGB bytes
+        self.assertEqual([0, 1, 1, 1, 1], colors[:, 3].tolist())
+        channels = np.round(colors[:, :3] * 255).astype(int)
+        codes = (channels[:, 0] << 16) | (channels[:, 1] << 8) | channels[:, 2]
+        self.assertEqual([0, 1, 2, 301, 70001], codes.tolist())
+
+    def test_write(self):
+        self.assertEqual(np.uint8, IndexRaster(2, 2, 254).indices.dtype)
+        self.assertEqual(np.uint16, IndexRaster(2, 2, 255).indices.dtype)
+        self.assertEqual(np.uint32, IndexRaster(2, 2, 65535).indices.dtype)
+
+        raster = IndexRaster(3, 2, 4)
+        raster.write(1, 0, np.array([[0, -1], [3, 2]]))
+        self.assertEqual([[0, 1, 0], [0, 4, 3]], raster.indices.tolist())
+
+    def test_colorize(self):
+        palette = Palette.fromHexList("#FF0000, #0000FF80")
+        raster = IndexRaster(4, 1, len(palette))
+        # Nothing drawn, both colors, and an index past the end wrapping around to the first
+        raster.indices[0] = [0, 1, 2, 3]
+
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 4, 1)
+        raster.colorize(surface, palette)
+        surface.flush()
+
+        pixels = np.ndarray((1, surface.get_stride() // 4, 4), dtype=np.uint8, buffer=surface.get_data())[0, :4]
+        expected = toPixels(np.concatenate(([[0, 0, 0, 0]], palette.array, palette.array[:1])))
+        np.testing.assert_array_equal(expected, pixels)
+
+    def test_encoded_matches_native(self):
+        # Squares drawn through cairo with encoded colors decode to the indices its raster path writes
+        random.seed(0)
+        colorMode = RandomColorMode(Palette.fromHexList("#FF0000, #00FF00, #0000FF, #FFFFFF"))
+        context = cairo.Context(cairo.ImageSurface(cairo.FORMAT_ARGB32, 50, 40))
+
+        native = IndexRaster.forContext(context, 4)
+        SquaresDrawMode(7).drawIndices(native, context, colorMode, 50, 40)
+        encoded = IndexRaster.forContext(context, 4)
+        encoded.drawEncoded(SquaresDrawMode(7), context, colorMode, 50, 40)
+        np.testing.assert_array_equal(native.indices, encoded.indices)
+
+
+@unittest.skipIf(cairo is None, "pycairo is not installed")
+class CirclesDrawModeUnitTests(unittest.TestCase):
+    def draw(self, context:cairo.Context) -> list[tuple[tuple, tuple]]:
+        random.seed(0)
+        self.colorMode = RandomColorMode(Palette.fromHexList("#FF0000, #00FF00, #0000FF"))
+        CirclesDrawMode(2000, 0, 20).draw(context, self.colorMode, 200, 100)
+
+        # Drawing takes the same random numbers however many circles were culled
+        self.after = random.random()
+        return [(color, circle) for (color, path) in context.fills for circle in path]
+
+    def test_grouped(self):
+        context = RecordingContext(cairo.ImageSurface(cairo.FORMAT_ARGB32, 200, 100))
+        circles = self.draw(context)
+
+        # One fill per color, with every circle the color its center picks
+        self.assertEqual(3, len(context.fills))
+        self.assertEqual(3, len({color for (color, _) in context.fills}))
+        for (color, (x, y, radius, start, end)) in circles:
+            self.assertEqual(tuple(self.colorMode.getColor(x / 200, y / 100).toTuple()), color)
+            self.assertEqual((0, 2 * math.pi), (start, end))
+        self.assertEqual(2000, len(circles))
+
+    def test_culled(self):
+        whole = self.draw(RecordingContext(cairo.ImageSurface(cairo.FORMAT_ARGB32, 200, 100)))
+        after = self.after
+
+        # A tile only draws the circles reaching into it, and leaves the random numbers where a whole draw does
+        context = RecordingContext(cairo.ImageSurface(cairo.FORMAT_ARGB32, 50, 50))
+        context.translate(-100, -50)
+        tile = self.draw(context)
+        self.assertEqual(after, self.after)
+
+        expected = [
+            (color, (x, y, radius, start, end))
+            for (color, (x, y, radius, start, end)) in whole
+            if x + radius > 100 and x - radius < 150 and y + radius > 50 and y - radius < 100
+        ]
+        self.assertLess(len(tile), len(whole))
+        # In the same fills in the same order, so overlapping circles stack as they do in a whole draw
+        self.assertEqual(expected, tile)
\ No newline at end of file
@@ -1,14 +1,14 @@
 from io import StringIO
+import random
 
-import shlex
 import unittest
 
-from models.input import InputEvaluator, InputParser, FunctionToken, ArrayToken, ValueToken
+from models.input import InputEvaluator, InputParser, InputReader, ReuseCache, FunctionToken, ArrayToken, ValueToken
 
 
 class InputParserUnitTests(unittest.TestCase):
     def test_value(self):
-        reader = shlex.shlex("item1")
+        reader = InputReader("item1")
         valueToken = InputParser._parseToken(reader)
 
         if not isinstance(valueToken, ValueToken):
@@ -17,7 +17,7 @@ class InputParserUnitTests(unittest.TestCase):
         self.assertEqual("item1", valueToken.value)
 
     def test_array(self):
-        reader = shlex.shlex("[item1, item2]")
+        reader = InputReader("[item1, item2]")
         arrayToken = InputParser._parseToken(reader)
 
         if not isinstance(arrayToken, ArrayToken):
@@ -36,7 +36,7 @@ class InputParserUnitTests(unittest.TestCase):
         self.assertEqual("item2", arrayToken.items[1].value)
 
     def test_function(self):
-        reader = shlex.shlex("SetColorMode(arg1, arg2)")
+        reader = InputReader("SetColorMode(arg1, arg2)")
         funcToken = InputParser._parseToken(reader)
 
         if not isinstance(funcToken, FunctionToken):
@@ -106,6 +106,33 @@ Draw()""")
         self.assertEqual("5000", tokens[1].args[0].args[0].value)
 
 
+    def test_quoted(self):
+        reader = InputReader("""["#ff0000", '0.5', a"b c"d, "\\"", 'it''s']""")
+        arrayToken = InputParser._parseToken(reader)
+
+        if not isinstance(arrayToken, ArrayToken):
+            self.fail("Did not get an array token")
+
+        self.assertEqual(["#ff0000", "0.5", "ab cd", '"', "its"], [x.value for x in arrayToken.items])
+
+    def test_comment(self):
+        tokens = InputParser.parse(StringIO("""# Comment
+Draw() # Trailing comment
+"""))
+
+        self.assertEqual(1, len(tokens))
+        self.assertEqual("Draw", tokens[0].name)
+
+    def test_unclosed_array(self):
+        with self.assertRaisesRegex(ValueError, "line 2, column 5"):
+            InputParser.parse(StringIO("""Draw()
+Set([a, b)"""))
+
+    def test_unclosed_quote(self):
+        with self.assertRaisesRegex(ValueError, "No closing quotation at line 1, column 5"):
+            InputParser.parse(StringIO('Set("a)'))
+
+
 class InputEvaluatorUnitTests(unittest.TestCase):
     def test_add(self):
         stream = StringIO("test(add(1, 2))")
@@ -155,4 +182,99 @@ class InputEvaluatorUnitTests(unittest.TestCase):
             self.assertEqual(3, input)
 
         evaluator = InputEvaluator([test])
-        evaluator.parse(tokens)
\ No newline at end of file
+        evaluator.parse(tokens)
+
+    def test_compile(self):
+        stream = StringIO("test(add(1, 2), [a, b])")
+        tokens = InputParser.parse(stream)
+
+        results = []
+        def test(total, array):
+            results.append((total, array))
+
+        parsedValues = []
+        def valueParser(value):
+            parsedValues.append(value)
+
+        evaluator = InputEvaluator([test], valueParser)
+        program = evaluator.compile(tokens)
+        program()
+        program()
+
+        self.assertEqual([(3, ["a", "b"]), (3, ["a", "b"])], results)
+        self.assertIsNot(results[0][1], results[1][1])
+
+        # Values are only converted while compiling
+        self.assertEqual(["1", "2", "a", "b"], parsedValues)
+
+    def test_unknown_function(self):
+        tokens = InputParser.parse(StringIO("missing(1)"))
+
+        with self.assertRaisesRegex(ValueError, "Unknown function missing"):
+            InputEvaluator([]).compile(tokens)
+
+    def test_reuse(self):
+        class Mode():
+            def __init__(self, *args):
+                self.args = args
+
+        results = []
+        def test(*modes):
+            results.append(modes)
+
+        reuse = ReuseCache()
+        evaluator = InputEvaluator([test, Mode], reusableFunctions=[Mode])
+
+        evaluator.compile(InputParser.parse(StringIO("test(Mode(1), Mode(1), Mode(2), Mode(random()))")), reuse)()
+        evaluator.compile(InputParser.parse(StringIO("test(Mode(1), Mode(1), Mode(3), Mode(random()))")), reuse)()
+
+        first, second = results
+
+        # Unchanged calls keep their own objects, even when identical to each other
+        self.assertIs(first[0], second[0])
+        self.assertIs(first[1], second[1])
+        self.assertIsNot(first[0], first[1])
+
+        # Changed and impure calls are built again
+        self.assertIsNot(first[2], second[2])
+        self.assertIsNot(first[3], second[3])
+
+    def test_reuse_random(self):
+        class Mode():
+            def __init__(self):
+                self.value = random.random()
+
+        results = []
+        def test(mode, value):
+            results.append((mode.value, value))
+
+        reuse = ReuseCache()
+        evaluator = InputEvaluator([test, Mode, random.random], reusableFunctions=[Mode])
+        program = evaluator.compile(InputParser.parse(StringIO("test(Mode(), random())")), reuse)
+
+        random.seed(1)
+        program()
+        random.seed(1)
+        program()
+
+        # Reusing the mode still skips the random numbers its build drew
+        self.assertEqual(results[0], results[1])
+
+    def test_reuse_reseeded(self):
+        class Mode():
+            def __init__(self, *args):
+                self.value = random.random()
+
+        results = []
+        def test(mode):
+            results.append(mode)
+
+        reuse = ReuseCache()
+        evaluator = InputEvaluator([test, Mode], reusableFunctions=[Mode])
+        evaluator.compile(InputParser.parse(StringIO("seed(1) test(Mode(3))")), reuse)()
+        evaluator.compile(InputParser.parse(StringIO("seed(2) test(Mode(3))")), reuse)()
+
+        # A changed seed builds the modes that draw random numbers again
+        random.seed(2)
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(random.random(), results[1].value)
\ No newline at end of file
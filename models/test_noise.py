@@ -0,0 +1,30 @@
+import unittest
+
+import numpy as np
+
+from models.noise import hashNormal, hashNormalPoint, hashUniform, hashUniformPoint
+
+
+class NoiseUnitTests(unittest.TestCase):
+    def setUp(self):
+        generator = np.random.default_rng(0)
+        self.xs = generator.random(1000) * 3 - 1
+        self.ys = generator.random(1000) * 3 - 1
+
+    def test_independent_of_batch(self):
+        values = hashUniform(42, self.xs, self.ys)
+
+        # The same value for a point whether it is evaluated alone, in a different batch or in another order
+        self.assertEqual(values[10], hashUniform(42, self.xs[10:11], self.ys[10:11])[0])
+        np.testing.assert_array_equal(values[500:], hashUniform(42, self.xs[500:], self.ys[500:]))
+        np.testing.assert_array_equal(values[::-1], hashUniform(42, self.xs[::-1], self.ys[::-1]))
+
+        self.assertFalse(np.array_equal(values, hashUniform(43, self.xs, self.ys)))
+        self.assertFalse(np.array_equal(values, hashUniform(42, self.xs, self.ys, 1)))
+
+    def test_points(self):
+        uniform = hashUniform(42, self.xs, self.ys, 3)
+        normal = hashNormal(42, self.xs, self.ys, 0.1, 1)
+        for (i, (x, y)) in enumerate(zip(self.xs.tolist(), self.ys.tolist())):
+            self.assertEqual(uniform[i], hashUniformPoint(42, x, y, 3))
+            self.assertEqual(normal[i], hashNormalPoint(42, x, y, 0.1, 1))
\ No newline at end of file
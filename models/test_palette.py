@@ -0,0 +1,32 @@
+import unittest
+
+from models import FloatColor, Palette
+
+
+class PaletteUnitTests(unittest.TestCase):
+    def test_from_hex_list(self):
+        palette = Palette.fromHexList("#FF0000, #00FF0080")
+
+        self.assertEqual(2, len(palette))
+        self.assertEqual((1.0, 0.0, 0.0, 1.0), palette[0].toTuple())
+        self.assertEqual((0.0, 1.0, 0.0, 128/255), palette[1].toTuple())
+
+    def test_subcolors(self):
+        palette = Palette.of([FloatColor(0, 0, 0), FloatColor(1, 1, 1)])
+
+        self.assertEqual([0.0, 0.5, 1.0], [color.r for color in palette.getSubcolors(1)])
+        self.assertEqual([0.0, 0.5, 1.0, 0.5], [color.r for color in palette.getSubcolors(1, wrap=True)])
+
+    def test_reorder(self):
+        palette = Palette.fromHexList("#000000, #FFFFFF, #FF0000")
+
+        self.assertEqual(["#FFFFFFFF", "#FF0000FF", "#000000FF"], [color.toHex() for color in palette.rotate(1)])
+        self.assertEqual(["#FF0000FF", "#FFFFFFFF", "#000000FF"], [color.toHex() for color in palette.reverse()])
+        self.assertEqual(["#FFFFFFFF"], [color.toHex() for color in palette.subset(1, 2)])
+
+    def test_concatenate(self):
+        palette = Palette.fromHexList("#000000")
+        colors = [FloatColor(1, 1, 1)]
+
+        self.assertEqual(["#FFFFFFFF", "#000000FF"], [color.toHex() for color in colors + palette])
+        self.assertEqual(["#000000FF", "#FFFFFFFF"], [color.toHex() for color in palette + colors])
\ No newline at end of file
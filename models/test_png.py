@@ -0,0 +1,30 @@
+from io import BytesIO
+
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from models.png import PngWriter
+
+
+class PngWriterUnitTests(unittest.TestCase):
+    def test_bands(self):
+        rows = np.random.default_rng(0).integers(0, 256, (37, 23, 4), dtype=np.uint8)
+
+        stream = BytesIO()
+        with PngWriter(stream, 23, 37) as writer:
+            for start in range(0, 37, 10):
+                writer.writeRows(rows[start:start + 10])
+
+        stream.seek(0)
+        image = Image.open(stream)
+        self.assertEqual("RGBA", image.mode)
+        self.assertTrue(np.array_equal(rows, np.asarray(image)))
+
+    def test_missing_rows(self):
+        writer = PngWriter(BytesIO(), 4, 4)
+        writer.writeRows(np.zeros((3, 4, 4), dtype=np.uint8))
+
+        with self.assertRaises(ValueError):
+            writer.close()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from models.spatial_index import GridIndex
+
+
+class GridIndexUnitTests(unittest.TestCase):
+    def test_box_order(self):
+        # Later boxes cover the earlier ones, so candidates must still come back in box order
+        index = GridIndex([
+            (0.4, 0.4, 0.6, 0.6),
+            (0.0, 0.0, 1.0, 1.0),
+            (0.3, 0.3, 0.7, 0.7),
+        ], resolution=4)
+
+        self.assertEqual([0, 1, 2], index.candidates(0.5, 0.5))
+        self.assertEqual([1], index.candidates(0.1, 0.9))
+        self.assertEqual([], index.candidates(1.5, 0.5))
+
+        xs = np.array([0.5, 0.1, 1.5])
+        ys = np.array([0.5, 0.9, 0.5])
+        matches = list(index.query(xs, ys))
+        self.assertEqual([0, 1, 2], [box for (box, _) in matches])
+
+        # Every candidate a point has alone comes back for it in the batch
+        for (box, points) in matches:
+            for point in range(len(xs)):
+                self.assertEqual(box in index.candidates(xs[point], ys[point]), point in points)
+
+    def test_boundaries(self):
+        # Corners and points on lattices, so many points sit exactly on box edges and cell boundaries
+        generator = np.random.default_rng(0)
+        for _ in range(300):
+            count = int(generator.integers(2, 60))
+            steps = int(generator.choice([10, 20, 50, 100]))
+            boxes = np.sort(generator.integers(0, steps + 1, (count, 2, 2)), axis=1).reshape(count, 4) / steps
+            index = GridIndex(boxes)
+
+            xs = generator.integers(0, steps + 1, 200) / steps
+            ys = generator.integers(0, steps + 1, 200) / steps
+            batched = {(box, point) for (box, points) in index.query(xs, ys) for point in points.tolist()}
+            single = {(box, point) for point in range(len(xs)) for box in index.candidates(xs[point], ys[point])}
+            self.assertEqual(single, batched)
+
+            # Every box containing a point, edges included, is a candidate for it
+            inside = (
+                (boxes[:, None, 0] <= xs) & (xs <= boxes[:, None, 2]) &
+                (boxes[:, None, 1] <= ys) & (ys <= boxes[:, None, 3])
+            )
+            self.assertLessEqual({(int(box), int(point)) for (box, point) in zip(*np.nonzero(inside))}, single)
\ No newline at end of file
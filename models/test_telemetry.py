@@ -0,0 +1,31 @@
+import unittest
+
+from models import FloatColor, Palette, Point
+from models.telemetry import Telemetry
+
+
+class TelemetryUnitTests(unittest.TestCase):
+    def test_counts(self):
+        init = FloatColor.__init__
+        with Telemetry() as telemetry:
+            palette = Palette.of([FloatColor(1, 0, 0), FloatColor(0, 1, 0)])
+            list(palette)
+            Point(0, 0) + Point(1, 1)
+
+        report = telemetry.toDict()
+        self.assertEqual({'FloatColor': 4, 'Palette': 1, 'Point': 3}, report['allocations'])
+        self.assertGreater(report['peakBytes'], 0)
+
+        # Nothing is counted afterwards
+        FloatColor(0, 0, 1)
+        self.assertEqual(4, telemetry.counts['FloatColor'])
+        self.assertIs(init, FloatColor.__init__)
+
+    def test_combine(self):
+        reports = [
+            {'seconds': 1.0, 'peakBytes': 10, 'allocations': {'Point': 2}, 'surface': None},
+            {'seconds': 2.0, 'peakBytes': 5, 'allocations': {'Point': 1, 'FloatColor': 3}, 'surface': None},
+        ]
+        report = Telemetry.combine(reports)
+        self.assertEqual(10, report['peakBytes'])
+        self.assertEqual({'Point': 3, 'FloatColor': 3}, report['allocations'])
\ No newline at end of file
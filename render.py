@@ -0,0 +1,471 @@
+"""Render
+
+Renders variations of an input file without a window, one PNG per seed.
+
+Usage:
+  render.py [options] <input> <output>
+
+Options:
+  -h --help                   Show this screen
+  -v --verbose                Print additional information
+  --width=<width>             Width of the image [default: 1024]
+  --height=<height>           Height of the image [default: 1024]
+  --seeds=<seeds>             Seeds to render, as start:end with end excluded [default: 0:1]
+  --workers=<workers>         Number of worker processes, defaults to the number of CPUs
+  --tile=<tile>               Split every image into tiles of this size, rendered in parallel
+  --band=<band>               Render every image in bands of this many rows, streamed into the PNG to bound memory
+  --indexed                   Draw palette indices and colorize them at the end, where the color mode allows
+  --telemetry                 Write the peak memory, model object counts and surface size of every seed to <seed>.telemetry.json
+
+"""
+from __future__ import annotations
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from io import StringIO
+from multiprocessing import shared_memory
+import contextlib
+import functools
+import itertools
+import json
+import logging
+import os
+import random
+import time
+import typing
+
+import cairo
+import docopt
+import numpy as np
+
+from color_modes import ColorMode
+from color_modes.gradient import GradientColorMode
+from color_modes.grid import GridColorMode
+from color_modes.linear_gradient import LinearGradientColorMode
+from color_modes.polygon import PolygonColorMode
+from color_modes.random import RandomColorMode
+from color_modes.modify.clamp import ClampColorMode
+from color_modes.modify.normal import NormalColorMode
+from color_modes.modify.transform import TransformColorMode
+from color_modes.modify.avg import AvgColorMode
+from color_modes.arc import ArcColorMode
+from color_modes.modify.globe import GlobeColorMode
+from color_modes.modify.voronoi import VoronoiColorMode
+
+from draw_modes import DrawMode, IndexRaster, fromPixels
+from draw_modes.circles import CirclesDrawMode
+from draw_modes.squares import SquaresDrawMode
+from draw_modes.triangles import TrianglesDrawMode
+from draw_modes.voronoi import VoronoiDrawMode
+from draw_modes.pattern import PatternDrawMode
+from draw_modes.hexagon import HexagonDrawMode
+from draw_modes.pixel import PixelDrawMode
+
+from models import FloatColor, Palette
+from models.cache import geometryCache
+from models.png import PngWriter
+from models.profiler import Profiler
+from models.telemetry import Telemetry
+
+from models.input import Incrementer, InputParser, InputEvaluator, ReuseCache
+
+class RenderCancelled(Exception):
+    """Raised part way through a render that is no longer wanted"""
+
+class Renderer(object):
+    """Evaluates input files onto a cairo surface, shared by the GUI and the headless renderer"""
+    def __init__(self, width:int, height:int, knownFunctions:list[typing.Callable]=[], context:cairo.Context=None, indexed:bool=False):
+        self.width, self.height = width, height
+
+        # Checked before every draw, so a render that has been superseded can stop early
+        self.cancelled:typing.Callable[[], bool] = None
+
+        # Whether the current render is a scaled down preview, which does not touch the surface
+        self.previewing = False
+
+        # Whether Draw behaves as DrawIndexed
+        self.indexed = indexed
+
+        # Every index raster drawn so far, with the palette it was colorized with, so Recolor can repaint without redrawing
+        self.layers:list[tuple[IndexRaster, Palette]] = []
+        # The surface as it was under the first layer, which Recolor repaints the layers over
+        self.base:cairo.ImageSurface = None
+        # Whether colors have been drawn over the layers, which Recolor would lose
+        self.drawnOver = False
+
+        # Draw onto the given context, e.g. one clipped to a tile, or onto a new surface
+        self.surface:cairo.ImageSurface = None
+        self.context:cairo.Context = None
+        if context:
+            self.surface = context.get_target()
+            self.context = context
+        else:
+            self.clear()
+
+        self.drawMode:DrawMode = None
+        def SetDrawMode(drawMode:DrawMode):
+            self.drawMode = drawMode
+
+        self.colorMode:ColorMode = None
+        def SetColorMode(colorMode:ColorMode):
+            self.colorMode = colorMode
+
+        def canDraw() -> bool:
+            self.checkCancelled()
+
+            if not self.colorMode:
+                logging.error("Color mode unset, unable to draw")
+                return False
+
+            if not self.drawMode:
+                logging.error("Draw mode unset, unable to draw")
+                return False
+            return True
+
+        def drawColors():
+            self.drawMode.draw(self.context, self.colorMode, self.width, self.height)
+            if self.layers:
+                self.drawnOver = True
+
+        def drawIndexed(palette:Palette):
+            if not self.layers:
+                self.base = cairo.ImageSurface(cairo.FORMAT_ARGB32, self.surface.get_width(), self.surface.get_height())
+                context = cairo.Context(self.base)
+                context.set_source_surface(self.surface)
+                context.paint()
+
+            raster = IndexRaster.forContext(self.context, len(palette))
+            self.drawMode.drawIndices(raster, self.context, self.colorMode, self.width, self.height)
+            raster.colorize(self.surface, palette)
+            self.layers.append((raster, palette))
+
+        def Draw():
+            if not canDraw():
+                return
+
+            palette = self.colorMode.getPalette() if self.indexed else None
+            if palette is not None:
+                drawIndexed(palette)
+                return
+
+            drawColors()
+
+        def DrawIndexed():
+            """Draw palette indices into a raster, then colorize it onto the surface with a lookup table.
+
+            Shapes within one draw replace each other rather than blending, and are not antialiased.
+            """
+            if not canDraw():
+                return
+
+            palette = self.colorMode.getPalette()
+            if palette is None:
+                logging.warning(f"{type(self.colorMode).__name__} has no palette, drawing colors instead")
+                drawColors()
+                return
+
+            drawIndexed(palette)
+
+        def Recolor(colors:list[FloatColor]|Palette):
+            """Repaint the indexed draws so far with another palette, over what was drawn before the first of them"""
+            palette = Palette.of(colors)
+            if not self.layers:
+                return
+            if self.drawnOver:
+                logging.warning("Colors have been drawn over the indexed draws, which recoloring would lose, skipping Recolor")
+                return
+
+            context = cairo.Context(self.surface)
+            context.set_operator(cairo.OPERATOR_SOURCE)
+            context.set_source_surface(self.base)
+            context.paint()
+
+            for (raster, _) in self.layers:
+                raster.colorize(self.surface, palette)
+            self.layers = [(raster, palette) for (raster, _) in self.layers]
+
+        def SetGeometryCacheSize(size:int|None):
+            geometryCache.resize(size)
+
+        def parseTypes(input:str):
+            if input.startswith("#") and (len(input) == 7 or len(input) == 9):
+                return FloatColor.fromHex(input)
+
+        self.evaluator = InputEvaluator(
+            itertools.chain(
+                DrawMode.__subclasses__(),
+                ColorMode.__subclasses__(),
+                [
+                    SetDrawMode,
+                    SetColorMode,
+                    Draw,
+                    DrawIndexed,
+                    Recolor,
+                    SetGeometryCacheSize,
+                    FloatColor.getSubcolors,
+                ],
+                knownFunctions,
+            ),
+            parseTypes,
+            itertools.chain(
+                DrawMode.__subclasses__(),
+                ColorMode.__subclasses__(),
+            )
+        )
+        self.reuse = ReuseCache()
+
+        # The last input and its compiled program, so unchanged input is not parsed again
+        self.source:str = None
+        self.program:typing.Callable[[], None] = None
+
+    def checkCancelled(self) -> None:
+        if self.cancelled and self.cancelled():
+            raise RenderCancelled()
+
+    def clear(self) -> None:
+        self.surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, self.width, self.height)
+        self.context = cairo.Context(self.surface)
+
+    def render(self, stream:typing.TextIO, incremental:bool=False, profiler:Profiler=None) -> None:
+        """Run the input, rebuilding every mode object, or when incremental only those whose tokens changed.
+
+        With a profiler, the input runs as a separately compiled program timing every node, which
+        rebuilds every object so each is timed in its own place in the tree.
+        """
+        source = stream.read()
+        if source != self.source:
+            self.program = self.evaluator.compile(InputParser.parse(StringIO(source)), self.reuse)
+            self.source = source
+
+        program = self.program
+        if profiler:
+            program = self.evaluator.compile(InputParser.parse(StringIO(source)), None, profiler)
+
+        if not incremental:
+            self.reuse.clear()
+        self.layers = []
+        self.base = None
+        self.drawnOver = False
+        self.checkCancelled()
+        try:
+            program()
+        finally:
+            if profiler:
+                profiler.restore()
+
+    @staticmethod
+    def createProfiler() -> Profiler:
+        """A profiler that also times the drawing and coloring methods of the modes the input builds"""
+        return Profiler([ColorMode, DrawMode], ['getColor', 'getColors', 'getIndices', 'draw', 'drawIndices'])
+
+    def renderPreview(self, stream:typing.TextIO, size:int, incremental:bool=False) -> cairo.ImageSurface:
+        """Render the input scaled down so its longest side is `size`, over a scaled down copy of the surface.
+
+        The surface itself is left untouched, and draw modes can see from the context's scale that
+        less detail is needed.
+        """
+        scale = size / max(self.width, self.height)
+        preview = cairo.ImageSurface(cairo.FORMAT_ARGB32, max(1, round(self.width * scale)), max(1, round(self.height * scale)))
+        context = cairo.Context(preview)
+        context.scale(preview.get_width() / self.width, preview.get_height() / self.height)
+
+        # Start from what has been drawn so far
+        context.set_source_surface(self.surface)
+        context.paint()
+
+        (surface, self.surface) = (self.surface, preview)
+        (fullContext, self.context) = (self.context, context)
+        self.previewing = True
+        try:
+            self.render(stream, incremental)
+        finally:
+            self.surface, self.context = surface, fullContext
+            self.previewing = False
+        return preview
+
+def saveTelemetry(outputDirectory:str, seed:int, report:dict[str, typing.Any]) -> None:
+    with open(os.path.join(outputDirectory, f"{seed}.telemetry.json"), mode='w') as stream:
+        json.dump(report, stream, indent=2)
+
+def renderSeed(inputFile:str, outputDirectory:str, width:int, height:int, seed:int, indexed:bool=False, telemetry:bool=False) -> tuple[int, float, str]:
+    """Render one variation of the input file, returning the seed, render time and image path"""
+    random.seed(seed)
+    Incrementer.index = 0
+
+    imageCount = 0
+    def _saveImage():
+        nonlocal imageCount
+        renderer.surface.write_to_png(os.path.join(outputDirectory, f"{seed}_{imageCount}.png"))
+        imageCount += 1
+
+    renderer = Renderer(width, height, [_saveImage], indexed=indexed)
+
+    start_time = time.perf_counter()
+    with open(inputFile, mode='r') as stream, (Telemetry() if telemetry else contextlib.nullcontext()) as measure:
+        renderer.render(stream)
+    time_elapsed = time.perf_counter() - start_time
+
+    if measure:
+        measure.recordSurface(renderer.surface)
+        saveTelemetry(outputDirectory, seed, measure.toDict())
+
+    path = os.path.join(outputDirectory, f"{seed}.png")
+    renderer.surface.write_to_png(path)
+    return (seed, time_elapsed, path)
+
+def getTiles(width:int, height:int, tileSize:int) -> list[tuple[int, int, int, int]]:
+    return [
+        (x, y, min(x + tileSize, width), min(y + tileSize, height))
+        for y in range(0, height, tileSize)
+        for x in range(0, width, tileSize)
+    ]
+
+def renderRegion(inputFile:str, surface:cairo.ImageSurface, width:int, height:int, seed:int, region:tuple[int, int, int, int], indexed:bool=False) -> None:
+    """Render the part of a seed's image inside the region onto a surface the size of the region.
+
+    The whole input is evaluated with the seed and only the region is drawn, so the parts of an
+    image match a render of the whole image however it is split.
+    """
+    random.seed(seed)
+    Incrementer.index = 0
+
+    x0, y0, x1, y1 = region
+    context = cairo.Context(surface)
+    context.translate(-x0, -y0)
+    context.rectangle(x0, y0, x1 - x0, y1 - y0)
+    context.clip()
+
+    def _saveImage():
+        logging.debug("Skipping _saveImage while rendering part of an image")
+
+    renderer = Renderer(width, height, [_saveImage], context, indexed)
+    with open(inputFile, mode='r') as stream:
+        renderer.render(stream)
+
+    # The renderer's functions refer back to it, so drop its references to the surface explicitly
+    renderer.surface, renderer.context = None, None
+
+def renderTile(inputFile:str, memoryName:str, width:int, height:int, seed:int, tile:tuple[int, int, int, int], indexed:bool=False, telemetry:bool=False) -> dict[str, typing.Any]|None:
+    """Render one tile of a seed's image into the shared image memory, returning its telemetry if asked for"""
+    x0, y0, x1, y1 = tile
+    stride = cairo.ImageSurface.format_stride_for_width(cairo.FORMAT_ARGB32, width)
+    memory = shared_memory.SharedMemory(name=memoryName)
+    try:
+        # A surface over just the tile's pixels, still using the full image's stride
+        surface = cairo.ImageSurface.create_for_data(memory.buf[y0 * stride + x0 * 4:], cairo.FORMAT_ARGB32, x1 - x0, y1 - y0, stride)
+        with (Telemetry() if telemetry else contextlib.nullcontext()) as measure:
+            renderRegion(inputFile, surface, width, height, seed, tile, indexed)
+
+        # Drop every reference into the shared memory so it can be closed
+        surface.finish()
+        del surface
+    finally:
+        memory.close()
+    return measure.toDict() if measure else None
+
+def renderBanded(inputFile:str, outputDirectory:str, width:int, height:int, seed:int, bandHeight:int, indexed:bool=False, telemetry:bool=False) -> tuple[int, float, str]:
+    """Render one variation of the input file a band of rows at a time, streaming each band into the PNG.
+
+    Only one band's pixels are held at once, so memory is bounded by the band height rather than the image size.
+    """
+    path = os.path.join(outputDirectory, f"{seed}.png")
+    start_time = time.perf_counter()
+    with open(path, mode='wb') as stream, (Telemetry() if telemetry else contextlib.nullcontext()) as measure:
+        with PngWriter(stream, width, height) as writer:
+            for y0 in range(0, height, bandHeight):
+                y1 = min(y0 + bandHeight, height)
+                surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, y1 - y0)
+                renderRegion(inputFile, surface, width, height, seed, (0, y0, width, y1), indexed)
+
+                surface.flush()
+                pixels = np.ndarray((y1 - y0, surface.get_stride() // 4, 4), dtype=np.uint8, buffer=surface.get_data())[:, :width]
+                writer.writeRows(fromPixels(pixels))
+                if measure:
+                    measure.recordSurface(surface)
+                surface.finish()
+    time_elapsed = time.perf_counter() - start_time
+
+    if measure:
+        saveTelemetry(outputDirectory, seed, measure.toDict())
+    return (seed, time_elapsed, path)
+
+def renderTiled(executor:Executor, inputFile:str, outputDirectory:str, width:int, height:int, seed:int, tileSize:int, indexed:bool=False, telemetry:bool=False) -> tuple[int, float, str]:
+    """Render one variation of the input file split into tiles across the executor's workers.
+
+    Every worker evaluates the whole input with the same seed, then draws only its own tile, so the
+    image does not depend on the tile size or number of workers.
+    """
+    stride = cairo.ImageSurface.format_stride_for_width(cairo.FORMAT_ARGB32, width)
+    # New shared memory starts zero filled, i.e. transparent
+    memory = shared_memory.SharedMemory(create=True, size=stride * height)
+    try:
+        start_time = time.perf_counter()
+        futures = [
+            executor.submit(renderTile, inputFile, memory.name, width, height, seed, tile, indexed, telemetry)
+            for tile in getTiles(width, height, tileSize)
+        ]
+        reports = [future.result() for future in futures]
+        time_elapsed = time.perf_counter() - start_time
+
+        path = os.path.join(outputDirectory, f"{seed}.png")
+        surface = cairo.ImageSurface.create_for_data(memory.buf, cairo.FORMAT_ARGB32, width, height, stride)
+        if telemetry:
+            # The tiles' surfaces are views into the one shared image
+            report = Telemetry.combine(reports)
+            report['surface'] = Telemetry.describeSurface(surface)
+            saveTelemetry(outputDirectory, seed, report)
+        surface.write_to_png(path)
+        surface.finish()
+        del surface
+    finally:
+        memory.close()
+        memory.unlink()
+    return (seed, time_elapsed, path)
+
+def main():
+    arguments = docopt.docopt(__doc__, version='v0.0.0')
+    logging.basicConfig(level=(logging.DEBUG if arguments['--verbose'] else logging.INFO))
+
+    width = int(arguments['--width'])
+    height = int(arguments['--height'])
+    start, end = (int(x) for x in arguments['--seeds'].split(':'))
+    workers = int(arguments['--workers']) if arguments['--workers'] else None
+
+    os.makedirs(arguments['<output>'], exist_ok=True)
+
+    timings:list[float] = []
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if arguments['--band']:
+            futures = [
+                executor.submit(renderBanded, arguments['<input>'], arguments['<output>'], width, height, seed, int(arguments['--band']), arguments['--indexed'], arguments['--telemetry'])
+                for seed in range(start, end)
+            ]
+            jobs = (future.result for future in as_completed(futures))
+        elif arguments['--tile']:
+            # Seeds one at a time, each split across the workers
+            jobs = (
+                functools.partial(renderTiled, executor, arguments['<input>'], arguments['<output>'], width, height, seed, int(arguments['--tile']), arguments['--indexed'], arguments['--telemetry'])
+                for seed in range(start, end)
+            )
+        else:
+            futures = [
+                executor.submit(renderSeed, arguments['<input>'], arguments['<output>'], width, height, seed, arguments['--indexed'], arguments['--telemetry'])
+                for seed in range(start, end)
+            ]
+            jobs = (future.result for future in as_completed(futures))
+
+        for job in jobs:
+            try:
+                seed, time_elapsed, path = job()
+            except Exception as ex:
+                logging.exception(ex)
+                continue
+            timings.append(time_elapsed)
+            print(f"Seed {seed} took {time_elapsed:f} seconds: {path}")
+    time_elapsed = time.perf_counter() - start_time
+
+    if timings:
+        print(f"Rendered {len(timings)} of {end - start} images in {time_elapsed:f} seconds ({len(timings) / time_elapsed:f} per second)")
+        print(f"Render time min {min(timings):f}, mean {sum(timings) / len(timings):f}, max {max(timings):f} seconds")
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""Calls back when a file changes, through watchdog's native events when it is installed or by polling otherwise"""
+from __future__ import annotations
+import logging
+import os
+import threading
+import typing
+
+try:
+    from watchdog.events import FileSystemEvent, FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+class _EventHandler(FileSystemEventHandler):
+    # Events that can change the file's contents. Opening and reading it, as rendering does, must not
+    # count, or every render would queue the next; 'closed' is only sent after a write
+    changeEvents = {'modified', 'created', 'moved', 'closed'}
+
+    def __init__(self, path:str, onChange:typing.Callable[[], None]):
+        self.path = path
+        self.onChange = onChange
+
+    def on_any_event(self, event:FileSystemEvent) -> None:
+        if event.event_type not in self.changeEvents:
+            return
+
+        # Editors often save by writing a new file and moving it over the old one
+        paths = [event.src_path, getattr(event, 'dest_path', '')]
+        if any(path and os.path.abspath(path) == self.path for path in paths):
+            self.onChange()
+
+class FileWatcher(object):
+    """Watches one file, calling onChange from a background thread whenever it is modified"""
+    def __init__(self, path:str, onChange:typing.Callable[[], None], interval:float=0.5):
+        self.path = os.path.abspath(path)
+        self.onChange = onChange
+
+        # Seconds between checks when polling
+        self.interval = interval
+
+        self.observer = None
+        self.thread:threading.Thread = None
+        self.stopped = threading.Event()
+
+    def start(self) -> None:
+        if Observer:
+            self.observer = Observer()
+            self.observer.schedule(_EventHandler(self.path, self.onChange), os.path.dirname(self.path))
+            self.observer.daemon = True
+            self.observer.start()
+            return
+
+        logging.debug("watchdog is not installed, polling %s for changes", self.path)
+        self.thread = threading.Thread(target=self._poll, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+
+    def _getModifiedTime(self) -> float|None:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            # Missing part way through being replaced
+            return None
+
+    def _poll(self) -> None:
+        modifiedTime = self._getModifiedTime()
+        while not self.stopped.wait(self.interval):
+            newModifiedTime = self._getModifiedTime()
+            if newModifiedTime is None or newModifiedTime == modifiedTime:
+                continue
+            modifiedTime = newModifiedTime
+            self.onChange()
\ No newline at end of file